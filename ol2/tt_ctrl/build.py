@@ -91,14 +91,14 @@ if __name__ == '__main__':
 
 	# Compute the PDN data to fit right in the vspine gap
 	lim_pts = [
-		tti.layout.ply_ctrl_vspine[f'spine_ow[{tti.layout.vspine.ow-1:d}]'],
-		tti.layout.ply_ctrl_vspine[ 'spine_ow[0]'],
-		tti.layout.ply_ctrl_vspine[f'spine_iw[{tti.layout.vspine.iw-1:d}]'],
-		tti.layout.ply_ctrl_vspine[ 'spine_iw[0]'],
+		tti.layout.ply_ctrl_vspine.track('spine_ow', tti.layout.vspine.ow-1),
+		tti.layout.ply_ctrl_vspine.track('spine_ow', 0),
+		tti.layout.ply_ctrl_vspine.track('spine_iw', tti.layout.vspine.iw-1),
+		tti.layout.ply_ctrl_vspine.track('spine_iw', 0),
 	]
 
-	pdn_vwidth   = tt.LayoutDimension(1600)
-	pdn_vspacing = tt.LayoutDimension(1700)
+	pdn_vwidth   = tti.layout.ctx.Dimension(1600)
+	pdn_vspacing = tti.layout.ctx.Dimension(1700)
 	pdn_vpitch = (pdn_vwidth + pdn_vspacing) * 3 + max(
 		lim_pts[1] - lim_pts[0],
 		lim_pts[3] - lim_pts[2],
@@ -242,7 +242,7 @@ class Router:
 		track_cfg = self.tti.cfg.pdk.tracks.met4.y
 
 		def track_align(v):
-			return track_cfg.offset + ((v - track_cfg.offset) // track_cfg.pitch) * track_cfg.pitch
+			return self.tti.layout.align.floor(v, 'met4', 'y')
 
 		# Scan all the muxes
 		for inst in self.reader.instances:
@@ -380,22 +380,20 @@ class Router:
 		cfg_tv = self.tti.cfg.pdk.tracks.met4.x
 		cfg_th = self.tti.cfg.pdk.tracks.met3.y
 
-		# Alignement function
-		def a(cfg, v):
-			return cfg.offset + ((v - cfg.offset) // cfg.pitch) * cfg.pitch
+		align = self.tti.layout.align
 
 		# Return requested track
 		if side == 'left':
 			t = cfg_tv.offset + cfg_tv.pitch * idx
 
 		elif side == 'right':
-			t = a(cfg_tv, die.xMax() - cfg_tv.pitch * idx)
+			t = align.floor(die.xMax() - cfg_tv.pitch * idx, 'met4', 'x')
 
 		elif side == 'bot':
 			t = cfg_th.offset + cfg_th.pitch * idx
 
 		elif side == 'top':
-			t = a(cfg_th, die.yMax() - cfg_th.pitch * idx)
+			t = align.floor(die.yMax() - cfg_th.pitch * idx, 'met3', 'y')
 
 		else:
 			# ?!!?
@@ -828,7 +826,7 @@ class ModulePowerStrapper:
 		self.grid = tech.getManufacturingGrid()
 
 	def _grid_align(self, v):
-		return (v // self.grid) * self.grid
+		return tt.TrackAlign.snap(v, self.grid)
 
 	def _find_stripe_space_width(self):
 		# Get all `met5` stripes for VGND
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+
+#
+# Benchmark of the placer and layout engine on synthetic shuttles
+#
+# Generates realistic random module lists for various grid sizes and
+# module mixes, then times ModulePlacer / AnalogPlacer / Layout / Die
+# construction and reports ops/sec and peak memory. Results can be saved
+# as a baseline and later runs compared against it (timings are absolute,
+# so only on the same machine).
+#
+# Copyright (c) 2026 agent <agent@local>
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import yaml
+
+import tt
+from tt.placer import AnalogPlacer
+
+
+# Module mixes: relative weight for each (width, height) tile size
+MIXES = {
+	'small': {
+		(1, 1): 90, (2, 1): 6, (1, 2): 4,
+	},
+	'mixed': {
+		(1, 1): 60, (2, 1): 12, (1, 2): 8, (2, 2): 8, (3, 2): 2,
+		(4, 2): 4, (6, 2): 1, (8, 2): 2, (4, 4): 1, (8, 4): 1,
+	},
+	'large': {
+		(1, 1): 20, (2, 1): 10, (2, 2): 20, (4, 1): 10, (4, 2): 15,
+		(6, 2): 5, (8, 1): 5, (8, 2): 10, (4, 4): 2, (8, 4): 3,
+	},
+}
+
+DEFAULT_GRIDS = [ (16, 32), (32, 64), (64, 128) ]
+
+PHASES = [ 'ModulePlacer', 'AnalogPlacer', 'Layout', 'Die' ]
+
+
+def synth_config(config, grid_x, grid_y):
+	"""
+	Load the config and resize the grid (and die proportionally so that
+	the block and mux sizes stay about the same)
+	"""
+	cfg = tt.TinyTapeout.get_config(config)
+
+	cfg.pdk.die.width  = cfg.pdk.die.width  * grid_x // cfg.tt.grid.x
+	cfg.pdk.die.height = cfg.pdk.die.height * grid_y // cfg.tt.grid.y
+
+	cfg.tt.grid.x = grid_x
+	cfg.tt.grid.y = grid_y
+
+	return cfg
+
+
+def synth_modules(cfg, mix, seed, fill=0.7, n_pinned=4, n_semi=4, n_analog=4):
+	"""
+	Generate a random module list for the given config
+	"""
+	rng = random.Random(seed)
+
+	gx = cfg.tt.grid.x
+	gy = cfg.tt.grid.y
+
+	# Muxes not available for digital modules
+	mux_missing = set()
+
+	analog_grps = cfg.tt.analog if 'analog' in cfg.tt else []
+	for grp in analog_grps:
+		mux_missing.update(grp['mux_id'])
+
+	if 'huge_modules' in cfg.tt:
+		mux_missing.update(cfg.tt.huge_modules.mux_id)
+
+	# Tile sizes and weights
+	sizes   = [ (w, h) for (w, h) in MIXES[mix].keys() if w <= gx // 2 ]
+	weights = [ MIXES[mix][s] for s in sizes ]
+
+	# Only a handful of height 4 modules can fit (facing missing muxes)
+	h4_max = len(mux_missing)
+
+	# Area budget
+	budget = fill * gx * (gy - len(mux_missing))
+
+	mods = []
+	used = set()
+
+	def new_module(**kwargs):
+		m = { 'name': f'bench_{seed:d}_{len(mods):d}' }
+		m.update(kwargs)
+		mods.append(m)
+		return m
+
+	# Analog modules
+	for i in range(n_analog if analog_grps else 0):
+		w = rng.choice([1, 1, 2])
+		m = new_module(
+			height = 2,
+			analog = { k: None for k in range(rng.randint(1, 4)) },
+			pg_vaa = rng.random() < 0.3,
+		)
+		if w > 1:
+			m['width'] = w
+		budget -= w * 2
+
+	# Fully pinned modules (1x1 at a random free logical position)
+	for i in range(n_pinned):
+		while True:
+			mux_id = rng.randrange(gy)
+			blk_id = rng.randrange(gx)
+			if (mux_id not in mux_missing) and ((mux_id, blk_id) not in used):
+				break
+		used.add( (mux_id, blk_id) )
+		new_module(mux_id=mux_id, blk_id=blk_id)
+		budget -= 1
+
+	# Semi pinned modules (1x1 with only X or Y)
+	for i in range(n_semi):
+		if i & 1:
+			new_module(x=rng.randrange(gx))
+		else:
+			new_module(y=rng.randrange(gy))
+		budget -= 1
+
+	# Fill the rest
+	while budget > 0:
+		w, h = rng.choices(sizes, weights)[0]
+
+		if h == 4:
+			if h4_max == 0:
+				continue
+			h4_max -= 1
+
+		m = new_module()
+		if w != 1:
+			m['width'] = w
+		if h != 1:
+			m['height'] = h
+		if rng.random() < 0.1:
+			m['pg_vdd'] = False
+
+		budget -= w * h
+
+	# Shuffle (but keep it deterministic)
+	rng.shuffle(mods)
+
+	return { 'modules': mods }
+
+
+def measure(fn, repeat):
+	"""
+	Runs `fn` `repeat` times and returns (ops/sec, peak memory, result).
+	Peak memory is measured on a separate run since tracemalloc adds
+	significant overhead
+	"""
+	t = time.perf_counter()
+	for i in range(repeat):
+		fn()
+	ops = repeat / (time.perf_counter() - t)
+
+	tracemalloc.start()
+	rv = fn()
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	return ops, peak, rv
+
+
+def bench_scenario(config, grid_x, grid_y, mix, seed, repeat, dump_dir=None):
+	# Config & Modules
+	cfg  = synth_config(config, grid_x, grid_y)
+	mods = synth_modules(cfg, mix, seed)
+
+	mod_fh = tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False)
+	with mod_fh:
+		yaml.dump(mods, mod_fh)
+
+	if dump_dir is not None:
+		with open(os.path.join(dump_dir, f'modules_{grid_x:d}x{grid_y:d}_{mix:s}_{seed:d}.yaml'), 'w') as fh:
+			yaml.dump(mods, fh)
+
+	res = {
+		'modules': len(mods['modules']),
+		'status':  'ok',
+	}
+
+	try:
+		# Placer
+		ops, peak, placer = measure(lambda: tt.ModulePlacer(cfg, mod_fh.name), repeat)
+		res['ModulePlacer'] = { 'ops': ops, 'peak': peak }
+
+		# Analog placer alone (on a fresh copy of the modules)
+		if placer.analog_ena:
+			def run_analog():
+				placer.load_modules(mod_fh.name)
+				AnalogPlacer(placer).place_modules(placer.modules)
+
+			ops, peak, _ = measure(run_analog, repeat)
+			res['AnalogPlacer'] = { 'ops': ops, 'peak': peak }
+
+			# Restore the fully placed state
+			placer = tt.ModulePlacer(cfg, mod_fh.name)
+
+		# Layout
+		ops, peak, layout = measure(lambda: tt.Layout(cfg).evaluate_all(), repeat)
+		res['Layout'] = { 'ops': ops, 'peak': peak }
+
+		# Die
+		ops, peak, _ = measure(lambda: tt.Die(layout, placer), repeat)
+		res['Die'] = { 'ops': ops, 'peak': peak }
+
+	except RuntimeError as e:
+		res['status'] = str(e)
+
+	finally:
+		os.unlink(mod_fh.name)
+
+	return res
+
+
+def compare(results, baseline, tolerance):
+	"""
+	Compare results with a baseline and return the list of regressions
+	"""
+	regressions = []
+
+	for name, res in results.items():
+		ref = baseline.get(name)
+		if ref is None:
+			continue
+
+		if ref['status'] != res['status']:
+			regressions.append(f"{name:s}: status changed from '{ref['status']:s}' to '{res['status']:s}'")
+
+		for phase in PHASES:
+			if (phase not in res) or (phase not in ref):
+				continue
+
+			ratio = res[phase]['ops'] / ref[phase]['ops']
+			if ratio < (1.0 - tolerance):
+				regressions.append(f"{name:s}: {phase:s} {ratio:.2f}x slower than baseline")
+
+			ratio = res[phase]['peak'] / max(ref[phase]['peak'], 1)
+			if ratio > (1.0 + tolerance):
+				regressions.append(f"{name:s}: {phase:s} uses {ratio:.2f}x the baseline peak memory")
+
+	return regressions
+
+
+def main():
+	# Arguments
+	def grid_size(s):
+		x, y = s.split('x')
+		return int(x), int(y)
+
+	parser = argparse.ArgumentParser()
+	parser.add_argument(
+		'--config', '-c', help='Base config file (grid and die get resized)',
+		type=str, default='sky130.yaml',
+	)
+	parser.add_argument(
+		'--grid', '-g', help='Grid size (e.g. 16x32), can be repeated',
+		type=grid_size, action='append',
+	)
+	parser.add_argument(
+		'--mix', '-m', help='Module mix, can be repeated',
+		choices=MIXES.keys(), action='append',
+	)
+	parser.add_argument(
+		'--seed', '-s', help='Random seed for module generation',
+		type=int, default=0,
+	)
+	parser.add_argument(
+		'--repeat', '-r', help='Number of timed runs per phase',
+		type=int, default=5,
+	)
+	parser.add_argument(
+		'--dump', help='Directory where to write the generated module lists',
+		type=str,
+	)
+	parser.add_argument(
+		'--baseline', '-b', help='Baseline JSON file to compare against',
+		type=str,
+	)
+	parser.add_argument(
+		'--tolerance', '-t', help='Relative slow down allowed vs baseline',
+		type=float, default=0.25,
+	)
+	parser.add_argument(
+		'--save', '-o', help='Save results as JSON (e.g. new baseline)',
+		type=str,
+	)
+	args = parser.parse_args()
+
+	grids = args.grid or DEFAULT_GRIDS
+	mixes = args.mix  or list(MIXES.keys())
+
+	# Run all scenarios
+	results = {}
+
+	print(f"{'Scenario':24s} {'Mods':>5s} " + ' '.join([f'{p:>20s}' for p in PHASES]))
+
+	for gx, gy in grids:
+		for mix in mixes:
+			name = f'{gx:d}x{gy:d}/{mix:s}/{args.seed:d}'
+			res  = bench_scenario(args.config, gx, gy, mix, args.seed, args.repeat, args.dump)
+			results[name] = res
+
+			cols = []
+			for phase in PHASES:
+				if phase in res:
+					cols.append(f"{res[phase]['ops']:8.2f}/s {res[phase]['peak'] / 1e6:7.2f}MB")
+				else:
+					cols.append(f"{'-':>20s}")
+
+			print(f"{name:24s} {res['modules']:5d} " + ' '.join(cols))
+
+			if res['status'] != 'ok':
+				print(f"  Failed: {res['status']:s}")
+
+	# Save
+	if args.save:
+		with open(args.save, 'w') as fh:
+			json.dump(results, fh, indent=2, sort_keys=True)
+
+	# Compare
+	if args.baseline:
+		with open(args.baseline, 'r') as fh:
+			baseline = json.load(fh)
+
+		regressions = compare(results, baseline, args.tolerance)
+
+		for r in regressions:
+			print(f"REGRESSION: {r:s}")
+
+		if regressions:
+			sys.exit(1)
+
+
+if __name__ == '__main__':
+	main()
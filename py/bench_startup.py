@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+#
+# Startup benchmark of the python entry points
+#
+# For every `py/*.py` script and the ol2 OpenDB scripts, measures in a
+# fresh interpreter the time to import the script (everything at module
+# level, without running main) and then the time of the first call into
+# the `tt` package (config + layout). Results can be saved as a baseline
+# and later runs compared against it.
+#
+# Copyright (c) 2026 agent <agent@local>
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir))
+
+ENTRY_GLOBS = [
+	'py/*.py',
+	'ol2/*/odb_*.py',
+]
+
+# Snippet running in the child interpreter
+PROBE = r'''
+import json, os, runpy, sys, time
+
+res = {}
+
+# Script sees no arguments
+sys.argv = sys.argv[1:2]
+
+t = time.perf_counter()
+try:
+	g = runpy.run_path(sys.argv[0], run_name='__startup_bench__')
+except BaseException as e:
+	res['status'] = f'{type(e).__name__}: {e}'
+	g = None
+res['import'] = time.perf_counter() - t
+
+if (g is not None) and ('tt' in g):
+	t = time.perf_counter()
+	tti = g['tt'].TinyTapeout(modules=False)
+	tti.layout.glb
+	res['first_call'] = time.perf_counter() - t
+
+print(json.dumps(res))
+'''
+
+PHASES = [ 'import', 'first_call' ]
+
+
+def bench_entry(path, repeat, env):
+	# Scripts are run from their own directory since some of them
+	# add relative paths to sys.path
+	samples = dict([ (p, []) for p in PHASES ])
+	status  = 'ok'
+
+	for i in range(repeat):
+		out = subprocess.run(
+			[ sys.executable, '-c', PROBE, path ],
+			cwd=os.path.dirname(path), env=env,
+			capture_output=True, text=True,
+		)
+
+		try:
+			res = json.loads(out.stdout.strip().splitlines()[-1])
+		except (IndexError, ValueError):
+			return { 'status': (out.stderr.strip().splitlines() or ['no output'])[-1] }
+
+		status = res.get('status', 'ok')
+
+		for p in PHASES:
+			if p in res:
+				samples[p].append(res[p])
+
+	rv = { 'status': status }
+	for p in PHASES:
+		if samples[p]:
+			rv[p] = statistics.median(samples[p])
+
+	return rv
+
+
+def compare(results, baseline, tolerance):
+	"""
+	Compare results with a baseline and return the list of regressions
+	"""
+	regressions = []
+
+	for name, res in results.items():
+		ref = baseline.get(name)
+		if ref is None:
+			continue
+
+		if ref['status'] != res['status']:
+			regressions.append(f"{name:s}: status changed from '{ref['status']:s}' to '{res['status']:s}'")
+
+		for phase in PHASES:
+			if (phase not in res) or (phase not in ref):
+				continue
+
+			ratio = res[phase] / max(ref[phase], 1e-6)
+			if ratio > (1.0 + tolerance):
+				regressions.append(f"{name:s}: {phase:s} {ratio:.2f}x slower than baseline")
+
+	return regressions
+
+
+def main():
+	# Arguments
+	parser = argparse.ArgumentParser()
+	parser.add_argument(
+		'--config', '-c', help='Config file (TT_CONFIG) for the first call',
+		type=str, default='sky130.yaml',
+	)
+	parser.add_argument(
+		'--repeat', '-r', help='Number of runs per entry point (median is reported)',
+		type=int, default=5,
+	)
+	parser.add_argument(
+		'--baseline', '-b', help='Baseline JSON file to compare against',
+		type=str,
+	)
+	parser.add_argument(
+		'--tolerance', '-t', help='Relative slow down allowed vs baseline',
+		type=float, default=0.5,
+	)
+	parser.add_argument(
+		'--save', '-o', help='Save results as JSON (e.g. new baseline)',
+		type=str,
+	)
+	parser.add_argument(
+		'entries', help='Entry points to benchmark (default: all)',
+		nargs='*',
+	)
+	args = parser.parse_args()
+
+	# Entry points
+	entries = args.entries or sorted([
+		fn for g in ENTRY_GLOBS for fn in glob.glob(os.path.join(ROOT, g))
+			if os.path.abspath(fn) != os.path.abspath(__file__)
+	])
+
+	# Environment: run with a private (but shared between runs) cache so
+	# the numbers don't depend on the user cache state
+	cache_dir = tempfile.TemporaryDirectory()
+
+	env = dict(os.environ)
+	env['TT_CONFIG']    = env.get('TT_CONFIG', args.config)
+	env['TT_CACHE_DIR'] = cache_dir.name
+	env['PYTHONPATH']   = os.pathsep.join([os.path.join(ROOT, 'py')] + ([env['PYTHONPATH']] if env.get('PYTHONPATH') else []))
+
+	# Run all entry points
+	results = {}
+
+	print(f"{'Entry point':32s} {'Import':>10s} {'First call':>10s}")
+
+	for fn in entries:
+		name = os.path.relpath(os.path.abspath(fn), ROOT)
+		res  = bench_entry(os.path.abspath(fn), args.repeat, env)
+		results[name] = res
+
+		cols = [ (f'{res[p] * 1e3:8.1f}ms' if p in res else f"{'-':>10s}") for p in PHASES ]
+		print(f"{name:32s} " + ' '.join(cols))
+
+		if res['status'] != 'ok':
+			print(f"  Failed: {res['status']:s}")
+
+	cache_dir.cleanup()
+
+	# Save
+	if args.save:
+		with open(args.save, 'w') as fh:
+			json.dump(results, fh, indent=2, sort_keys=True)
+
+	# Compare
+	if args.baseline:
+		with open(args.baseline, 'r') as fh:
+			baseline = json.load(fh)
+
+		regressions = compare(results, baseline, args.tolerance)
+
+		for r in regressions:
+			print(f"REGRESSION: {r:s}")
+
+		if regressions:
+			sys.exit(1)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+
+#
+# Exports the computed layout as an artifact that can be shared by all
+# build steps (point TT_LAYOUT to it so they don't recompute it)
+#
+# Copyright (c) 2026 agent <agent@local>
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import sys
+
+import tt
+
+
+def main(argv0, out_fn):
+	tti = tt.TinyTapeout(modules=False)
+	tti.layout.save(out_fn)
+
+
+if __name__ == '__main__':
+	main(*sys.argv)
@@ -8,16 +8,98 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 
+import argparse
 import sys
 
 import tt
 
 
-def main(argv0, src_fn, dst_fn):
+def main():
+	# Arguments
+	parser = argparse.ArgumentParser()
+	parser.add_argument('src_fn', help='Input module list')
+	parser.add_argument('dst_fn', help='Output placed module list', nargs='?')
+	parser.add_argument(
+		'--check', '-c', action='store_true',
+		help='Only run the capacity checks (exit code 1 if provably infeasible)',
+	)
+	parser.add_argument(
+		'--incremental', '-i', metavar='PREV_PLACED',
+		help='Previous placement result. Unchanged modules keep their slot',
+		type=str,
+	)
+	parser.add_argument(
+		'--optimize', '-O', metavar='SECONDS',
+		help='Time budget to search for a better placement than the greedy one',
+		type=float,
+	)
+	parser.add_argument(
+		'--jobs', '-j',
+		help='Number of parallel optimization restarts (default: CPU count)',
+		type=int,
+	)
+	parser.add_argument(
+		'--analog-balance', '-a',
+		help='Assign analog modules to groups/pins globally to balance pad loading',
+		action='store_true',
+	)
+	parser.add_argument(
+		'--report', '-r', metavar='REPORT_JSON',
+		help='Write placement statistics (phase timings, rejections, attempts) as JSON',
+		type=str,
+	)
+	args = parser.parse_args()
+
+	# Load config
 	cfg = tt.TinyTapeout.get_config()
-	placer = tt.ModulePlacer(cfg, src_fn, verbose=True)
-	placer.save_modules(dst_fn)
+
+	# Capacity check only ?
+	if args.check:
+		placer = tt.ModulePlacer(cfg, args.src_fn, previous=args.incremental, place=False)
+		checks = placer.check_capacity()
+
+		for c in checks:
+			print(f"{c.name:28s} {c.required:5d} / {c.available:5d}" + (f"  MISSING {c.deficit:d}" if c.deficit else ""))
+
+		if any([c.deficit for c in checks]):
+			print("Placement is infeasible")
+			sys.exit(1)
+
+		return
+
+	if args.dst_fn is None:
+		parser.error('the following arguments are required: dst_fn')
+
+	# Place
+	report = tt.PlacementReport() if args.report else None
+
+	try:
+		placer = tt.ModulePlacer(cfg, args.src_fn,
+			verbose  = True,
+			previous = args.incremental,
+			optimize = args.optimize,
+			jobs     = args.jobs,
+			analog_balance = args.analog_balance,
+			report   = report,
+		)
+	finally:
+		# Save the report even if placement failed
+		if report is not None:
+			report.save(args.report)
+
+	placer.save_modules(args.dst_fn)
+
+	# Report changes vs previous placement
+	if args.incremental:
+		def fmt(lpos):
+			return '-' if lpos is None else f'{lpos[0]:2d}/{lpos[1]:2d}'
+
+		for kind in [ 'added', 'moved', 'removed' ]:
+			for name, old, new in placer.changes[kind]:
+				print(f"{kind:8s} {fmt(old):>5s} -> {fmt(new):5s} '{name:s}'")
+
+		print(f"{len(placer.changes['moved']):d} moved, {len(placer.changes['added']):d} added, {len(placer.changes['removed']):d} removed")
 
 
 if __name__ == '__main__':
-	main(*sys.argv)
+	main()
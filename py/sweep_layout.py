@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+#
+# Design-space sweep of the Layout parameters
+#
+# Builds a Layout for every combination of the given parameter values
+# (in a process pool) and reports feasibility and a few metrics
+#
+# Example:
+#   ./sweep_layout.py -p tt.grid.y=24,32 -p tt.margin.x=4,5 -p tt.uio.io=8,10
+#
+# Copyright (c) 2026 agent <agent@local>
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import argparse
+import itertools
+import json
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+import tt
+
+
+COLUMNS = [
+	# Name          Header          Format
+	( 'block_area', 'Block um2',    '{:10.0f}' ),
+	( 'mux_margin', 'Mux margin',   '{:10.2f}' ),
+	( 'blk_util',   'Blk trk %',    '{:9.1f}' ),
+	( 'hsp_util',   'HSpine trk %', '{:12.1f}' ),
+	( 'vsp_util',   'VSpine trk %', '{:12.1f}' ),
+]
+
+
+def parse_param(s):
+	path, values = s.split('=', 1)
+
+	def conv(v):
+		try:
+			return int(v)
+		except ValueError:
+			return v
+
+	return path, [ conv(v) for v in values.split(',') ]
+
+
+def config_set(cfg, path, value):
+	node = cfg
+	keys = path.split('.')
+	for k in keys[:-1]:
+		node = node[k]
+	node[keys[-1]] = value
+
+
+def evaluate(config, point):
+	"""
+	Builds the layout for one point of the sweep and returns its metrics
+	(runs in a worker process)
+	"""
+	try:
+		res = metrics(config, point)
+		res['status'] = 'ok'
+
+	except RuntimeError as e:
+		# Layout not feasible
+		res = { 'status': str(e) }
+
+	except Exception as e:
+		# Anything else (bad override path or value, ...) only fails this point
+		res = { 'status': f'error: {type(e).__name__:s}: {e}' }
+
+	return res
+
+
+def metrics(config, point):
+	"""Metrics of the layout for one point of the sweep (raises if not feasible)"""
+	cfg = tt.TinyTapeout.get_config(config)
+	for path, value in point:
+		config_set(cfg, path, value)
+
+	layout = tt.Layout(cfg).check()
+
+	res = {}
+
+	glb = layout.glb
+
+	vt = cfg.pdk.tracks[cfg.tt.spine.vlayer].x
+	ht = cfg.pdk.tracks[cfg.tt.spine.hlayer].y
+
+	# Block area
+	res['block_area'] = glb.block.width.um * glb.block.height.um
+
+	# Room left in the mux for the horizontal spine (in um)
+	res['mux_margin'] = (glb.mux.height - layout.hspine_tracks() * ht.pitch).um
+
+	# Tracks utilization
+	res['blk_util'] = 100.0 * len(layout.ply_block)       / (glb.block.width  // vt.pitch)
+	res['hsp_util'] = 100.0 * len(layout.ply_mux_bus)     / (glb.mux.height   // ht.pitch)
+	res['vsp_util'] = 100.0 * len(layout.ply_ctrl_vspine) / (glb.ctrl.width   // vt.pitch)
+
+	return res
+
+
+def main():
+	# Arguments
+	parser = argparse.ArgumentParser()
+	parser.add_argument(
+		'--config', '-c', help='Base config file',
+		type=str,
+	)
+	parser.add_argument(
+		'--param', '-p', help='Parameter to sweep as path=v1,v2,... (can be repeated)',
+		type=parse_param, action='append', required=True,
+	)
+	parser.add_argument(
+		'--jobs', '-j', help='Number of worker processes (default: CPU count)',
+		type=int, default=os.cpu_count(),
+	)
+	parser.add_argument(
+		'--json', '-o', help='Also save the results as JSON',
+		type=str,
+	)
+	args = parser.parse_args()
+
+	# Generate all points
+	paths  = [ p for p, v in args.param ]
+	points = [ list(zip(paths, values)) for values in itertools.product(*[ v for p, v in args.param ]) ]
+
+	# Evaluate them
+	with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+		results = list(pool.map(evaluate, itertools.repeat(args.config), points))
+
+	# Report
+	pw = [ max(len(p), 6) for p in paths ]
+
+	print(' '.join([ f'{p:>{w}s}' for p, w in zip(paths, pw) ] + [ h for n, h, f in COLUMNS ]) + ' Status')
+
+	for point, res in zip(points, results):
+		cols = [ f'{str(v):>{w}s}' for (p, v), w in zip(point, pw) ]
+		for n, h, f in COLUMNS:
+			cols.append(f.format(res[n]) if n in res else f'{"-":>{len(h)}s}')
+		cols.append(res['status'])
+		print(' '.join(cols))
+
+	n_ok = sum([ 1 for r in results if r['status'] == 'ok' ])
+	print(f'{n_ok:d} / {len(results):d} feasible')
+
+	# Save
+	if args.json:
+		with open(args.json, 'w') as fh:
+			json.dump([ dict(point=dict(p), **r) for p, r in zip(points, results) ], fh, indent=2)
+
+
+if __name__ == '__main__':
+	main()
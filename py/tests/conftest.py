@@ -0,0 +1,14 @@
+#
+# Tiny Tapeout
+#
+# Test setup: make the `tt` package importable whatever the directory
+# pytest is run from
+#
+# Copyright (c) 2026 agent <agent@local>
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
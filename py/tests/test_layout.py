@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+#
+# Tiny Tapeout
+#
+# Layout artifact, alignment and checks
+#
+# Copyright (c) 2026 agent <agent@local>
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import json
+import os
+import tempfile
+import unittest
+
+import tt
+from tt.layout import Layout
+from tt.utils import *
+
+
+class LayoutTestCase(unittest.TestCase):
+
+	CONFIG = 'sky130.yaml'
+
+	def setUp(self):
+		self.cfg = tt.TinyTapeout.get_config(self.CONFIG)
+		self.tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(self.tmp.cleanup)
+
+
+class ArtifactTest(LayoutTestCase):
+
+	def test_save_load(self):
+		fn = os.path.join(self.tmp.name, 'layout.json')
+		ref = Layout(self.cfg)
+		ref.save(fn)
+
+		lay = Layout.load(tt.TinyTapeout.get_config(self.CONFIG), fn)
+		self.assertEqual(lay.export(), ref.export())
+
+		for name in Layout.ARTIFACT_PLY:
+			with self.subTest(name=name):
+				self.assertEqual(list(getattr(lay, name).items()), list(getattr(ref, name).items()))
+
+		self.assertEqual(lay.glb.block.width, ref.glb.block.width)
+		self.assertEqual(lay.hspine_tracks(), ref.hspine_tracks())
+		lay.check()
+
+	def test_other_config(self):
+		fn = os.path.join(self.tmp.name, 'layout.json')
+		Layout(self.cfg).save(fn)
+
+		cfg = tt.TinyTapeout.get_config(self.CONFIG)
+		cfg.tt.grid.y = self.cfg.tt.grid.y + 2
+		with self.assertRaises(RuntimeError):
+			Layout.load(cfg, fn)
+
+
+class TrackAlignTest(LayoutTestCase):
+
+	def test_array(self):
+		align = Layout(self.cfg).align
+		ctx   = LayoutContext(2000)
+		vals  = LayoutDimensionArray(range(-5000, 5000, 37), ctx)
+
+		for mode in [ 'floor', 'ceil', 'nearest' ]:
+			with self.subTest(mode=mode):
+				res = align.snap(vals, 170, 85, mode)
+				self.assertIs(res.ctx, ctx)
+				self.assertEqual(list(res), [ align.snap(v, 170, 85, mode) for v in vals ])
+				self.assertEqual(list(res), align.snap(list(vals), 170, 85, mode))
+
+		for ceil in [ False, True ]:
+			with self.subTest(ceil=ceil):
+				res = align.site(vals, 'met4', 'x', ceil)
+				self.assertEqual(list(res), [ align.site(v, 'met4', 'x', ceil) for v in vals ])
+
+
+class CheckTest(LayoutTestCase):
+
+	def test_valid(self):
+		Layout(self.cfg).check()
+
+	def test_lazy(self):
+		lay = Layout(self.cfg, check=True)
+		self.assertNotIn(Layout.SUB_LAYOUT_OF['ply_block'], lay._done)
+
+		lay.ply_block
+		self.assertIn(Layout.SUB_LAYOUT_OF['ply_block'], lay._done)
+		self.assertNotIn(Layout.SUB_LAYOUT_OF['ply_ctrl_vspine'], lay._done)
+
+	def test_off_grid(self):
+		fn = os.path.join(self.tmp.name, 'layout.json')
+		Layout(self.cfg).save(fn)
+
+		with open(fn, 'r') as fh:
+			data = json.load(fh)
+		pin = next(iter(data['ply_block']))
+		data['ply_block'][pin] += 1
+		with open(fn, 'w') as fh:
+			json.dump(data, fh)
+
+		lay = Layout.load(self.cfg, fn)
+		with self.assertRaisesRegex(RuntimeError, 'ply_block: 1 pin'):
+			lay.check()
+
+
+if __name__ == '__main__':
+	unittest.main()
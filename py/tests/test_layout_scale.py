@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+#
+# Tiny Tapeout
+#
+# Layout dimensions with a non-default PDK scale
+#
+# Copyright (c) 2026 agent <agent@local>
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import unittest
+
+import tt
+from tt.layout import Layout
+from tt.utils import *
+
+
+def _walk(node, path='glb'):
+	for k, v in node._dat.items():
+		if isinstance(v, LayoutNode):
+			yield from _walk(v, f'{path:s}.{k:s}')
+		else:
+			yield f'{path:s}.{k:s}', v
+
+
+class LayoutScaleTest(unittest.TestCase):
+
+	SCALE = 2000
+
+	@classmethod
+	def setUpClass(kls):
+		cfg = tt.TinyTapeout.get_config('sky130.yaml')
+		cfg.pdk.scale = kls.SCALE
+		kls.layout = Layout(cfg).evaluate_all()
+
+	def test_context(self):
+		self.assertEqual(self.layout.ctx.scale, self.SCALE)
+
+	def test_glb(self):
+		dim = self.layout.ctx.Dimension
+		for path, v in _walk(self.layout.glb):
+			with self.subTest(path=path):
+				self.assertIs(v.__class__, dim)
+				self.assertEqual(v.iu, v.nm * self.SCALE // 1000)
+
+	def test_pins(self):
+		dim = self.layout.ctx.Dimension
+		for name in Layout.ARTIFACT_PLY:
+			t = getattr(self.layout, name).tracks()[0]
+			with self.subTest(name=name):
+				self.assertIs(t.__class__, dim)
+				self.assertEqual(t.iu, t.nm * self.SCALE // 1000)
+
+	def test_mixed_context(self):
+		a = LayoutContext(self.SCALE).Dimension(1000)
+		b = LayoutContext(self.SCALE * 2).Dimension(1000)
+		with self.assertRaises(ValueError):
+			a + b
+		with self.assertRaises(ValueError):
+			a // b
+		self.assertIs((a + LayoutDimension(1000)).__class__, a.__class__)
+
+
+if __name__ == '__main__':
+	unittest.main()
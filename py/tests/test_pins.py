@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+#
+# Tiny Tapeout
+#
+# Pin tables
+#
+# Copyright (c) 2026 agent <agent@local>
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import unittest
+
+from tt.pins import PinTable
+from tt.utils import *
+
+
+class PinTableTest(unittest.TestCase):
+
+	def setUp(self):
+		# Unused track (None) is skipped, buses are interleaved
+		self.tbl = PinTable(
+			[ ('a', 2), None, ('b', None), ('a', 0), ('a', 1), ('c', 5) ],
+			[ 10, 20, 30, 40, 50, 60 ],
+		)
+
+	def test_iteration_order(self):
+		self.assertEqual(list(self.tbl), [ 'a[2]', 'b', 'a[0]', 'a[1]', 'c[5]' ])
+		self.assertEqual(self.tbl.tracks().nm, [ 10, 30, 40, 50, 60 ])
+		self.assertEqual(list(self.tbl.items()), list(zip(self.tbl, self.tbl.values())))
+		self.assertEqual(len(self.tbl), 5)
+
+	def test_track(self):
+		self.assertEqual(self.tbl.track('a', 0), 40)
+		self.assertEqual(self.tbl.track('b'), 30)
+		self.assertEqual(self.tbl['a[1]'], 50)
+		self.assertIn('c[5]', self.tbl)
+		self.assertNotIn('c', self.tbl)
+		self.assertNotIn('a[3]', self.tbl)
+		with self.assertRaises(KeyError):
+			self.tbl.track('a', 3)
+		with self.assertRaises(KeyError):
+			self.tbl['x']
+
+	def test_bus(self):
+		self.assertEqual(self.tbl.buses(), [ 'a', 'b', 'c' ])
+		self.assertEqual(self.tbl.bus('a'), [ (2, 10), (0, 40), (1, 50) ])
+		self.assertEqual(self.tbl.bus('a', 1, 2), [ (2, 10), (1, 50) ])
+		self.assertEqual(self.tbl.bus('b'), [ (-1, 30) ])
+		with self.assertRaises(KeyError):
+			self.tbl.bus('x')
+
+	def test_from_dict_merge(self):
+		d = dict(self.tbl.items())
+		self.assertEqual(dict(PinTable.from_dict(d).items()), d)
+
+		m = PinTable.merge(self.tbl, PinTable([ ('d', 0) ], [ 70 ]))
+		self.assertEqual(list(m), list(self.tbl) + [ 'd[0]' ])
+		self.assertEqual(m.tracks().nm, [ 10, 30, 40, 50, 60, 70 ])
+		self.assertEqual((m.min(), m.max()), (10, 70))
+
+	def test_context(self):
+		ctx = LayoutContext(2000)
+		tbl = PinTable([ ('a', 0), ('a', 1) ], LayoutDimensionArray([ 100, 200 ], ctx))
+		self.assertIs(tbl.track('a', 1).__class__, ctx.Dimension)
+		self.assertIs(tbl.tracks().ctx, ctx)
+		self.assertEqual(tbl.tracks().iu, [ 200, 400 ])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+#
+# Tiny Tapeout
+#
+# Module placer
+#
+# Copyright (c) 2026 agent <agent@local>
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import os
+import random
+import tempfile
+import unittest
+
+import yaml
+
+import tt
+
+
+def _gen_modules(seed, gx, gy, analog):
+	"""Random module list filling 30% to 85% of the grid"""
+	r = random.Random(seed)
+	mods = []
+	budget = r.uniform(0.3, 0.85) * gx * gy
+
+	while budget > 0:
+		m = { 'name': f'm{seed:d}_{len(mods):d}' }
+
+		w = min(r.choice([1, 1, 1, 1, 2, 2, 3, 4, 6, 8]), gx // 2)
+		h = r.choice([1, 1, 1, 2, 2])
+		if w != 1:
+			m['width'] = w
+		if h != 1:
+			m['height'] = h
+		budget -= w * h
+
+		if r.random() < 0.03 and w <= 2 and h <= 2:
+			m['y'] = r.randrange(gy)
+		elif analog and r.random() < 0.08 and h == 2 and w <= 2:
+			m['analog'] = dict([ (k, None) for k in range(r.randint(1, 4)) ])
+		if r.random() < 0.2:
+			m['pg_vdd'] = False
+
+		mods.append(m)
+
+	return { 'modules': mods }
+
+
+class PlacerTestCase(unittest.TestCase):
+
+	CONFIG = 'sky130.yaml'
+
+	@classmethod
+	def setUpClass(kls):
+		kls.cfg = tt.TinyTapeout.get_config(kls.CONFIG)
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(self.tmp.cleanup)
+
+	def write(self, name, data):
+		fn = os.path.join(self.tmp.name, name)
+		with open(fn, 'w') as fh:
+			yaml.dump(data, fh)
+		return fn
+
+
+class IncrementalTest(PlacerTestCase):
+
+	def place(self, src, previous=None):
+		p = tt.ModulePlacer(self.cfg, self.write(src, self.src), previous=previous)
+		fn = os.path.join(self.tmp.name, 'placed_' + src)
+		p.save_modules(fn)
+		return p, fn
+
+	def setUp(self):
+		super().setUp()
+		self.src = _gen_modules(1, self.cfg.tt.grid.x, self.cfg.tt.grid.y, analog=False)
+		self.p0, self.prev_fn = self.place('v0.yaml')
+		self.pos = dict([ (m.name, (m.pos_x, m.pos_y)) for m in self.p0.modules ])
+
+	def test_unchanged(self):
+		p1, _ = self.place('v1.yaml', self.prev_fn)
+		self.assertEqual(p1.changes, { 'added': [], 'moved': [], 'removed': [] })
+		self.assertEqual(dict([ (m.name, (m.pos_x, m.pos_y)) for m in p1.modules ]), self.pos)
+
+	def test_added_removed(self):
+		removed = self.src['modules'].pop(0)['name']
+		self.src['modules'].append({ 'name': 'new' })
+
+		p1, _ = self.place('v1.yaml', self.prev_fn)
+		self.assertEqual([ c[0] for c in p1.changes['added'] ], [ 'new' ])
+		self.assertEqual([ c[0] for c in p1.changes['removed'] ], [ removed ])
+		self.assertEqual(p1.changes['moved'], [])
+
+	def test_fixed_on_previous_slot(self):
+		# New module fixed where an unchanged (unconstrained) one used to be
+		victim = next(m for m in self.p0.modules if (m.width, m.height) == (1, 1) and m.name in [
+			s['name'] for s in self.src['modules'] if ('x' not in s) and ('y' not in s)
+		])
+		x, y = self.pos[victim.name]
+		self.src['modules'].append({ 'name': 'new', 'x': x, 'y': y })
+
+		p1, _ = self.place('v1.yaml', self.prev_fn)
+		pos = dict([ (m.name, (m.pos_x, m.pos_y)) for m in p1.modules ])
+
+		self.assertEqual(pos['new'], (x, y))
+		self.assertNotEqual(pos[victim.name], (x, y))
+		self.assertEqual([ c[0] for c in p1.changes['moved'] ], [ victim.name ])
+
+		# Everything else stays in place
+		for name, xy in self.pos.items():
+			if name != victim.name:
+				self.assertEqual(pos[name], xy)
+
+
+class CapacityTest(PlacerTestCase):
+
+	SEEDS = range(40)
+
+	def test_placeable_never_flagged(self):
+		gx = self.cfg.tt.grid.x
+		gy = self.cfg.tt.grid.y
+		placed = 0
+
+		for seed in self.SEEDS:
+			fn = self.write(f'in_{seed:d}.yaml', _gen_modules(seed, gx, gy, analog=True))
+
+			try:
+				tt.ModulePlacer(self.cfg, fn)
+			except RuntimeError:
+				continue
+			placed += 1
+
+			checks = tt.ModulePlacer(self.cfg, fn, place=False).check_capacity()
+			with self.subTest(seed=seed):
+				self.assertEqual([ c.name for c in checks if c.deficit ], [])
+
+		# Make sure the test actually covers something
+		self.assertGreater(placed, len(self.SEEDS) // 4)
+
+	def test_overfull_flagged(self):
+		gx = self.cfg.tt.grid.x
+		gy = self.cfg.tt.grid.y
+		fn = self.write('full.yaml', { 'modules': [ { 'name': f'm{i:d}' } for i in range(gx * gy + 1) ] })
+
+		checks = tt.ModulePlacer(self.cfg, fn, place=False).check_capacity()
+		self.assertTrue(any([ c.deficit for c in checks ]))
+
+
+if __name__ == '__main__':
+	unittest.main()
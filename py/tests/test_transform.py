@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+#
+# Tiny Tapeout
+#
+# Placement transforms
+#
+# Copyright (c) 2026 agent <agent@local>
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import unittest
+
+from tt.transform import Transform
+from tt.utils import *
+
+
+class TransformTest(unittest.TestCase):
+
+	POINTS = [ (0, 0), (10, 0), (0, 20), (-7, 13), Point(5, -3) ]
+	RECTS  = [ Rect(0, 0, 10, 20), Rect(-5, 3, 7, 4), (1, 2, 3, 4) ]
+
+	def test_orients(self):
+		for orient in Transform.ORIENTS:
+			t = Transform.from_orient(orient)
+			with self.subTest(orient=orient):
+				self.assertEqual(t.orient, orient)
+				self.assertEqual(t @ Transform.identity(), t)
+
+	def test_batch(self):
+		for orient in Transform.ORIENTS:
+			t = Transform.place((100, 200), orient, 30, 40)
+			with self.subTest(orient=orient):
+				self.assertEqual(t.apply_points(self.POINTS), [ t.apply(p) for p in self.POINTS ])
+				self.assertEqual(t.apply_rects(self.RECTS), [ t.apply_rect(Rect(*r)) for r in self.RECTS ])
+				for r in t.apply_rects(self.RECTS):
+					self.assertTrue((r.x0 <= r.x1) and (r.y0 <= r.y1))
+				self.assertEqual(t.apply_points([]), [])
+
+	def test_place(self):
+		for orient in Transform.ORIENTS:
+			t = Transform.place((100, 200), orient, 30, 40)
+			with self.subTest(orient=orient):
+				r = t.apply_rect(Rect(0, 0, 30, 40))
+				self.assertEqual((r.x0, r.y0), (100, 200))
+				self.assertEqual(sorted([ r.x1 - r.x0, r.y1 - r.y0 ]), [ 30, 40 ])
+
+	def test_compose(self):
+		a = Transform.place((10, 20), 'W', 5, 7)
+		b = Transform.place((-3, 4), 'FS', 2, 9)
+		for p in self.POINTS:
+			self.assertEqual((a @ b).apply(p), a.apply(b.apply(p)))
+
+		with self.assertRaises(RuntimeError):
+			Transform.from_orient('X')
+
+
+if __name__ == '__main__':
+	unittest.main()
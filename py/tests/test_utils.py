@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+#
+# Tiny Tapeout
+#
+# Utilities
+#
+# Copyright (c) 2026 agent <agent@local>
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import glob
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import tt
+from tt.utils import *
+
+
+class DiskCacheTest(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(self.tmp.cleanup)
+
+		self.cache_dir = os.path.join(self.tmp.name, 'cache')
+		self.cfg_fn    = os.path.join(self.tmp.name, 'cfg.yaml')
+
+	def write_cfg(self, value, mtime_ns):
+		with open(self.cfg_fn, 'w') as fh:
+			fh.write(f'a:\n  b: {value:d}\n')
+		os.utime(self.cfg_fn, ns=(mtime_ns, mtime_ns))
+
+	def entries(self):
+		return glob.glob(os.path.join(self.cache_dir, 'config-*.pkl'))
+
+	def test_opt_in(self):
+		with mock.patch.dict(os.environ, { 'TT_CACHE_DIR': '' }):
+			cache = DiskCache('test')
+			self.assertIsNone(cache.path)
+			cache.store('k', 1)
+			self.assertIsNone(cache.load('k'))
+
+		with mock.patch.dict(os.environ):
+			os.environ.pop('TT_CACHE_DIR', None)
+			self.assertIsNone(DiskCache('test').path)
+
+		with mock.patch.dict(os.environ, { 'TT_CACHE_DIR': self.cache_dir }):
+			cache = DiskCache('test')
+			cache.store('k', { 'x': 1 })
+			self.assertEqual(cache.load('k'), { 'x': 1 })
+			self.assertIsNone(cache.load('other'))
+
+	def test_key(self):
+		k = DiskCache.key('a', b'b', 1)
+		self.assertEqual(k, DiskCache.key('a', b'b', 1))
+		self.assertNotEqual(k, DiskCache.key('a', b'b', 2))
+		self.assertNotEqual(k, DiskCache.key('ab', b'', 1))
+
+		# Any change to the package sources invalidates everything
+		with mock.patch.object(DiskCache, '_code_version', 'other'):
+			self.assertNotEqual(k, DiskCache.key('a', b'b', 1))
+
+	def test_config(self):
+		with mock.patch.dict(os.environ, { 'TT_CACHE_DIR': self.cache_dir }):
+			self.write_cfg(1, 10**18)
+			self.assertEqual(tt.TinyTapeout._load_config([ self.cfg_fn ]).a.b, 1)
+			self.assertEqual(len(self.entries()), 1)
+
+			# Cache hit
+			self.assertEqual(tt.TinyTapeout._load_config([ self.cfg_fn ]).a.b, 1)
+			self.assertEqual(len(self.entries()), 1)
+
+			# Content change (even with the same mtime)
+			self.write_cfg(2, 10**18)
+			self.assertEqual(tt.TinyTapeout._load_config([ self.cfg_fn ]).a.b, 2)
+			self.assertEqual(len(self.entries()), 2)
+
+			# mtime change
+			self.write_cfg(2, 2 * 10**18)
+			self.assertEqual(tt.TinyTapeout._load_config([ self.cfg_fn ]).a.b, 2)
+			self.assertEqual(len(self.entries()), 3)
+
+
+class LayoutDimensionArrayTest(unittest.TestCase):
+
+	def setUp(self):
+		self.ctx = LayoutContext(2000)
+		self.arr = LayoutDimensionArray([ 100, 250, 400 ], self.ctx)
+
+	def test_units(self):
+		self.assertEqual(self.arr.nm, [ 100, 250, 400 ])
+		self.assertEqual(self.arr.um, [ 0.1, 0.25, 0.4 ])
+		self.assertEqual(self.arr.iu, [ 200, 500, 800 ])
+		self.assertEqual(LayoutDimensionArray.from_iu([ 200, 500 ], self.ctx).nm, [ 100, 250 ])
+		for v in self.arr:
+			self.assertIs(v.__class__, self.ctx.Dimension)
+
+	def test_ops(self):
+		d = self.ctx.Dimension(50)
+		self.assertEqual((self.arr + d).nm, [ 150, 300, 450 ])
+		self.assertEqual((self.arr - 100).nm, [ 0, 150, 300 ])
+		self.assertEqual((2 * self.arr).nm, [ 200, 500, 800 ])
+		self.assertEqual((self.arr + self.arr).nm, [ 200, 500, 800 ])
+		self.assertEqual((self.arr // 2).nm, [ 50, 125, 200 ])
+		self.assertEqual((self.arr + d).ctx, self.ctx)
+
+		# Dimension / dimension gives plain numbers
+		self.assertEqual(self.arr // d, [ 2, 5, 8 ])
+		self.assertEqual(self.arr % 150, LayoutDimensionArray([ 100, 100, 100 ], self.ctx))
+
+		# dim x dim has no meaning
+		with self.assertRaises(ValueError):
+			self.arr * d
+		with self.assertRaises(ValueError):
+			self.arr * self.arr
+
+	def test_mixed_context(self):
+		other = LayoutDimensionArray([ 1, 2, 3 ], LayoutContext(4000))
+		with self.assertRaises(ValueError):
+			self.arr + other
+		with self.assertRaises(ValueError):
+			self.arr + LayoutContext(4000).Dimension(1)
+
+		# Default context values adopt the array context
+		self.assertEqual((self.arr + LayoutDimension(1)).ctx, self.ctx)
+
+	def test_build(self):
+		a = LayoutDimensionArray.arange(self.ctx.Dimension(0), 500, 200)
+		self.assertEqual(a.nm, [ 0, 200, 400 ])
+		self.assertIs(a.ctx, self.ctx)
+
+		c = LayoutDimensionArray.concat(a, self.arr)
+		self.assertEqual(len(c), 6)
+		self.assertEqual((c.min(), c.max()), (0, 400))
+		self.assertEqual(c[1:3].nm, [ 200, 400 ])
+
+
+class FrozenConfigNodeTest(unittest.TestCase):
+
+	def test_reserved_keys(self):
+		f = ConfigNode({ 'keys': 1, 'get': 2, 'a': { 'count': 3, 'b': 4 } }).freeze()
+
+		self.assertEqual(f['keys'], 1)
+		self.assertEqual(f.get('get'), 2)
+		self.assertEqual(f.a['count'], 3)
+		self.assertEqual(f.a.b, 4)
+		self.assertEqual(list(f.keys()), [ 'keys', 'get', 'a' ])
+		self.assertEqual(f.a.count(3), 1)
+
+	def test_hash(self):
+		a = ConfigNode({ 'x': 1, 'y': { 'z': [ 1, 2 ] } })
+		b = ConfigNode({ 'x': 1, 'y': { 'z': [ 1, 2 ] } })
+		self.assertEqual(a.freeze(), b.freeze())
+		self.assertEqual(a.content_hash(), b.content_hash())
+
+		b.y.z = [ 2, 1 ]
+		self.assertNotEqual(a.content_hash(), b.content_hash())
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -7,20 +7,67 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 
+import importlib
 import os
 
 from .utils import *
-from .placer import *
-from .layout import *
-from .elements import *
+
+
+# The heavier sub-modules are only imported on first use (PEP 562)
+_LAZY_ATTRS = {
+	'placer': [
+		'CapacityCheck', 'ModuleSlot', 'ModulePlacer', 'PlacementReport',
+	],
+	'layout': [
+		'Layout',
+	],
+	'pins': [
+		'PinTable',
+	],
+	'transform': [
+		'Transform',
+	],
+	'align': [
+		'TrackAlign',
+	],
+	'elements': [
+		'LayoutElement', 'LayoutElementPlacement', 'MacroInstance',
+		'PowerSwitch', 'AnalogSwitch', 'Block', 'Mux', 'Branch',
+		'Controller', 'Top', 'Die',
+	],
+}
+
+_LAZY_MAP = dict([ (n, m) for m, names in _LAZY_ATTRS.items() for n in names ])
+
+
+def __getattr__(name):
+	# Sub-module itself or one of its exported names ?
+	if name in _LAZY_ATTRS:
+		return importlib.import_module(f'.{name:s}', __name__)
+
+	mod_name = _LAZY_MAP.get(name)
+	if mod_name is None:
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+	val = getattr(importlib.import_module(f'.{mod_name:s}', __name__), name)
+	globals()[name] = val
+
+	return val
+
+
+def __dir__():
+	return sorted(list(globals().keys()) + list(_LAZY_MAP.keys()))
 
 
 class TinyTapeout:
 
 	def __init__(self, config=None, modules=None):
+		from .placer   import ModulePlacer
+		from .elements import Die
+
 		# Generic config / layout
 		self.cfg    = self.get_config(config)
-		self.layout = Layout(self.cfg)
+		self.layout = self.get_layout(self.cfg)
 
 		# Modules placement
 		if modules is not False:
@@ -58,6 +105,52 @@ class TinyTapeout:
 			raise RuntimeError('Multiple modules files are not supported')
 		return None if not mf else mf[0]
 
+	@classmethod
+	def get_layout(kls, cfg):
+		from .layout import Layout
+
+		# Validate the pin tables unless disabled with TT_LAYOUT_CHECK=0
+		check = os.getenv('TT_LAYOUT_CHECK', '1') != '0'
+
+		# Use the pre-computed layout artifact if one is provided
+		fn = os.getenv('TT_LAYOUT')
+		if fn:
+			layout = Layout.load(cfg, fn)
+			if check:
+				layout.check()
+		else:
+			# Each sub-layout is checked when (lazily) evaluated
+			layout = Layout(cfg, check=check)
+
+		return layout
+
+	@classmethod
+	def _load_config(kls, config):
+		# Read all files
+		data = []
+		for fn in config:
+			with open(fn, 'rb') as fh:
+				data.append( (os.path.abspath(fn), os.fstat(fh.fileno()).st_mtime_ns, fh.read()) )
+
+		# Cache key from file list, mtimes and content
+		key = DiskCache.key(*[ x for d in data for x in d ])
+
+		# Try the cache
+		cache = DiskCache('config')
+
+		cfg = cache.load(key)
+		if isinstance(cfg, ConfigNode):
+			return cfg
+
+		# Parse and merge the YAML
+		cfg = ConfigNode()
+		for fn, mtime, content in data:
+			cfg.update_from_yaml(content)
+
+		cache.store(key, cfg)
+
+		return cfg
+
 	@classmethod
 	def get_config(kls, config=None):
 		# Determine the config files
@@ -66,9 +159,7 @@ class TinyTapeout:
 			raise RuntimeError('Unable to load config. Make sure either PDK and/or TT_CONFIG env var is set')
 
 		# Load actual config
-		cfg = ConfigNode()
-		for fn in config:
-			cfg.update_from_yaml(open(fn, 'r'))
+		cfg = kls._load_config(config)
 
 		# Check PDK
 		pdk_env = os.getenv('PDK')
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+#
+# Tiny Tapeout
+#
+# Track / Site alignment
+#
+# Copyright (c) 2026 agent <agent@local>
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import math
+
+from .utils import *
+
+
+__all__ = [ 'TrackAlign' ]
+
+
+class TrackAlign:
+	"""
+	Snapping of coordinates to routing tracks and placement sites.
+
+	Built once per config, it holds for each (layer, axis) the track
+	offset and pitch as well as the LCM of the track pitch and the site
+	size (to stay on both grids at once).
+
+	All methods accept a single value, a LayoutDimensionArray (snapped in
+	one pass on the raw nm values, an array is returned) or any other
+	iterable (convenience only, each value is snapped in turn and a list is
+	returned).
+	"""
+
+	def __init__(self, cfg):
+		site = {
+			'x': cfg.pdk.site.width,
+			'y': cfg.pdk.site.height,
+		}
+
+		self.tracks = {}	# (layer, axis) -> (offset, pitch)
+		self.lcm    = {}	# (layer, axis) -> lcm(pitch, site)
+
+		for layer, ltc in cfg.pdk.tracks.items():
+			for axis in 'xy':
+				tc = ltc[axis]
+				self.tracks[(layer, axis)] = (tc.offset, tc.pitch)
+				self.lcm[(layer, axis)]    = math.lcm(tc.pitch, site[axis])
+
+	@staticmethod
+	def _like(x, v):
+		# Result with the same type (and so LayoutContext) as the input
+		return x.__class__(v) if isinstance(x, LayoutDimension) else v
+
+	@staticmethod
+	def _apply(v, fn, *operands):
+		# `fn(x, *operands)` is used as-is on scalars and on the plain ints
+		# (and operands) for arrays
+		if isinstance(v, LayoutDimensionArray):
+			iops = [ int(o) for o in operands ]
+			return v.map(lambda x: fn(x, *iops), *operands)
+		if isinstance(v, (list, tuple)) or hasattr(v, '__next__'):
+			return [ fn(x, *operands) for x in v ]
+		return fn(v, *operands)
+
+	# Generic grid
+	@classmethod
+	def snap(kls, v, pitch, offset=0, mode='floor'):
+		"""Snap to an arbitrary grid (e.g. manufacturing grid)"""
+		if mode == 'floor':
+			fn = lambda x, o, p: o + ((x - o) // p) * p
+		elif mode == 'ceil':
+			fn = lambda x, o, p: o + ((x - o + p - 1) // p) * p
+		elif mode == 'nearest':
+			fn = lambda x, o, p: o + ((x - o + p // 2) // p) * p
+		else:
+			raise ValueError(f'Invalid snap mode {mode}')
+
+		return kls._apply(v, fn, offset, pitch)
+
+	# Routing tracks
+	def floor(self, v, layer, axis):
+		offset, pitch = self.tracks[(layer, axis)]
+		return self.snap(v, pitch, offset, 'floor')
+
+	def ceil(self, v, layer, axis):
+		offset, pitch = self.tracks[(layer, axis)]
+		return self.snap(v, pitch, offset, 'ceil')
+
+	def nearest(self, v, layer, axis):
+		offset, pitch = self.tracks[(layer, axis)]
+		return self.snap(v, pitch, offset, 'nearest')
+
+	# Tracks and sites
+	def site(self, v, layer, axis, ceil=False):
+		"""Align to a multiple of both the track pitch and the site size"""
+		a = self.lcm[(layer, axis)]
+
+		if ceil:
+			return self._apply(v, lambda x, a: self._like(x, int((x + a - 1) // a) * a), a)
+		else:
+			return self._apply(v, lambda x, a: self._like(x, int(x // a) * a), a)
@@ -16,7 +16,8 @@ try:
 except ModuleNotFoundError:
 	pass
 
-from .utils import *
+from .transform import Transform
+from .utils     import *
 
 
 __all__ = [
@@ -51,82 +52,79 @@ class LayoutElement:
 		self.height = height
 		self.parent = parent
 		self.children = {}
+		self._xforms = {}
+		self._sub_macros = None
 
 	def add_child(self, child, pos, orient='N', name=None):
-		# Set parent
+		# Set parent (an element is only ever placed in a single parent, which
+		# is what allows invalidating the cached flattened macros below)
+		if (child.parent is not None) and (child.parent is not self):
+			raise RuntimeError('Layout element already placed in another parent')
+
 		child.parent = self
 
 		# Add to children
 		self.children[child] = LayoutElementPlacement(child, pos, orient, name)
+		self._xforms[child]  = Transform.place(
+			(int(pos[0]), int(pos[1])), orient, int(child.width), int(child.height)
+		)
 
-	def get_sub_macros(self):
-		# Scan children and returned named ones
-		rv = []
+		# Flattened macros of this element and its parents are now stale
+		elem = self
+		while elem is not None:
+			elem._sub_macros = None
+			elem = elem.parent
+
+	def iter_sub_macros(self):
+		"""
+		Yields all the macro instances below this element, with position
+		and orientation relative to this element. For each named child,
+		its own sub-macros come first and then the child itself (if it's a
+		macro). Unnamed children are skipped along with their sub-tree.
+
+		The walk is iterative and keeps on the stack the transform from
+		each level to this element (composed once per sub-tree), so each
+		instance is transformed directly to the final coordinates.
+		"""
+		# Already flattened ?
+		if self._sub_macros is not None:
+			yield from self._sub_macros
+			return
+
+		# Transforms are on plain ints (nm), positions converted back at the end
+		dim = self.layout.ctx.Dimension
+
+		# Stack of (element, children iterator, transform to self, name prefix, pending child)
+		stack = [ (self, iter(self.children.values()), Transform.identity(), '', None) ]
+
+		while stack:
+			elem, it, xf, pfx, pending = stack[-1]
+
+			cp = next(it, None)
+
+			# Done with this level, child itself comes last
+			if cp is None:
+				stack.pop()
+
+				if (pending is not None) and (pending.elem.mod_name is not None):
+					bb = xf.apply_rect(Rect(0, 0, int(pending.elem.width), int(pending.elem.height)))
+					yield MacroInstance(pfx[:-1], pending.elem.mod_name, Point(dim(bb.x0), dim(bb.y0)), xf.orient, pending.elem)
+
+				continue
 
-		for cp in self.children.values():
 			# Only named ones
 			if cp.name is None:
 				continue
 
-			# Get sub macro from the child
-			sml = cp.elem.get_sub_macros()
-
-			# If we're not a leaf, we need to transform the return list
-			# with whatever transform is applied to that child
-			for sm in sml:
-				if cp.orient == 'N':
-					pos    = cp.pos + sm.pos
-					orient = sm.orient
-
-				elif cp.orient == 'S':
-					pos = cp.pos + Point(
-						cp.elem.width  - (sm.pos.x + sm.elem.width),
-						cp.elem.height - (sm.pos.y + sm.elem.height),
-					)
-					orient = {
-						'N':  'S',
-						'FS': 'FN',
-					}[sm.orient]
-
-				elif cp.orient == 'FN':
-					pos = cp.pos + Point(
-						cp.elem.width - (sm.pos.x + sm.elem.width),
-						sm.pos.y
-					)
-					orient = {
-						'N':  'FN',
-						'FS': 'S',
-					}[sm.orient]
-
-				elif cp.orient == 'FS':
-					pos = cp.pos + Point(
-						sm.pos.x,
-						cp.elem.height - (sm.pos.y + sm.elem.height),
-					)
-					orient = {
-						'N':  'FS',
-						'FS': 'N',
-					}[sm.orient]
-
-
-				else:
-					raise RuntimeError('Not implemented')
-
-				rv.append(MacroInstance(
-					cp.name + '.' + sm.inst_name,
-					sm.mod_name,
-					pos,
-					orient,
-					sm.elem
-				))
-
-			# That child is a leaf, so just return it
-			else:
-				if cp.elem.mod_name is not None:
-					rv.append( MacroInstance(cp.name, cp.elem.mod_name, cp.pos, cp.orient, cp.elem) )
-
-		return rv
+			# Descend
+			stack.append( (cp.elem, iter(cp.elem.children.values()), xf @ elem._xforms[cp.elem], pfx + cp.name + '.', cp) )
 
+	def get_sub_macros(self):
+		# Flatten once and cache (invalidated by `add_child`), callers get
+		# their own copy
+		if self._sub_macros is None:
+			self._sub_macros = tuple(self.iter_sub_macros())
+		return list(self._sub_macros)
 
 	def _render(self, dwg):
 		# Draw self
@@ -144,30 +142,8 @@ class LayoutElement:
 			dwg.add(cg)
 
 			# Apply transform placing it in design
-			cg.translate(cp.pos[0], cp.pos[1])
-
-			# Apply orientation transform
-			if cp.orient == 'N':
-				# Nothing to do
-				pass
-
-			elif cp.orient == 'S':
-				# South
-				cg.translate(cp.elem.width, cp.elem.height)
-				cg.scale(-1, -1)
-
-			elif cp.orient == 'FS':
-				# Flipped South
-				cg.translate(0, cp.elem.height)
-				cg.scale(1, -1)
-
-			elif cp.orient == 'FN':
-				# Flipped North
-				cg.translate(cp.elem.width, 0)
-				cg.scale(-1, 1)
-
-			else:
-				raise RuntimeError('Unsupported orientation')
+			xf = self._xforms[cp.elem]
+			cg.matrix(xf.a, xf.c, xf.b, xf.d, xf.tx, xf.ty)
 
 			# Render
 			cp.elem._render(cg)
@@ -310,10 +286,7 @@ class Block(LayoutElement):
 			pin_ofs += self.layout.glb.pg_vaa.offset
 
 		# Render pins
-		for pn, pp in self.layout.ply_block.items():
-			# Apply offset
-			pp -= pin_ofs
-
+		for pp in self.layout.ply_block.tracks() - pin_ofs:
 			# Draw pin
 			dwg.add(svg.shapes.Rect(
 				( pp-150, self.height-1000 ),
@@ -324,10 +297,7 @@ class Block(LayoutElement):
 		if not self.analog:
 			return
 
-		for pn, pp in self.layout.ply_block_analog.items():
-			# Apply offset
-			pp -= pin_ofs
-
+		for pp in self.layout.ply_block_analog.tracks() - pin_ofs:
 			# Draw pin
 			dwg.add(svg.shapes.Rect(
 				( pp-300, 0),
@@ -360,7 +330,7 @@ class Mux(LayoutElement):
 
 		# Render pins
 			# User blocks bottom
-		for pn, pp in self.layout.ply_mux_bot.items():
+		for pp in self.layout.ply_mux_bot.tracks():
 			dwg.add(svg.shapes.Rect(
 				( pp-150, 0 ),
 				( 300,    1000),
@@ -368,7 +338,7 @@ class Mux(LayoutElement):
 			))
 
 			# User blocks top
-		for pn, pp in self.layout.ply_mux_top.items():
+		for pp in self.layout.ply_mux_top.tracks():
 			dwg.add(svg.shapes.Rect(
 				( pp-150, self.height-1000 ),
 				( 300,    1000),
@@ -376,7 +346,7 @@ class Mux(LayoutElement):
 			))
 
 			# V-Spine connection
-		for pn, pp in self.layout.ply_mux_port.items():
+		for pp in self.layout.ply_mux_port.tracks():
 			dwg.add(svg.shapes.Rect(
 				( self.width-1000, pp-150 ),
 				( 1000, 300),
@@ -444,7 +414,7 @@ class Branch(LayoutElement):
 						pos_y = blk_y + (layout.glb.margin.y + block.height)
 						orient = 'FS'
 
-					pos_x = blk_x + layout.ply_block_analog[f'ua[{k:d}]'] - ana_sw.width // 2
+					pos_x = blk_x + layout.ply_block_analog.track('ua', k) - ana_sw.width // 2
 
 					# Add as child
 					self.add_child(ana_sw, Point(pos_x, pos_y), orient, name=name_pfx+f'tt_asw_{k:d}_I')
@@ -497,7 +467,7 @@ class Controller(LayoutElement):
 
 		# Render pins
 			# Vspine connections
-		for pn, pp in self.layout.ply_ctrl_vspine.items():
+		for pp in self.layout.ply_ctrl_vspine.tracks():
 				# Top
 			dwg.add(svg.shapes.Rect(
 				( pp-150, self.height-1000 ),
@@ -513,7 +483,7 @@ class Controller(LayoutElement):
 			))
 
 			# IO top
-		for pn, pp in self.layout.ply_ctrl_io_top.items():
+		for pp in self.layout.ply_ctrl_io_top.tracks():
 			dwg.add(svg.shapes.Rect(
 				( pp-150, self.height-1000 ),
 				( 300,    1000),
@@ -521,7 +491,7 @@ class Controller(LayoutElement):
 			))
 
 			# IO bottom
-		for pn, pp in self.layout.ply_ctrl_io_bot.items():
+		for pp in self.layout.ply_ctrl_io_bot.tracks():
 			dwg.add(svg.shapes.Rect(
 				( pp-150, 0 ),
 				( 300,    1000),
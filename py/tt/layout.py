@@ -9,8 +9,10 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 
-import math
+import json
 
+from .align import TrackAlign
+from .pins  import *
 from .utils import *
 
 
@@ -27,17 +29,17 @@ CFG_SCHEMA = [
 
 def config_update_for_layout(cfg):
 	"""This updates a config according to schema above, converting some `int` to
-	LayoutDimension objects"""
+	LayoutDimension objects (of the LayoutContext for this config, which is
+	returned)"""
 
-	# Apply scale for this config
-	if 'scale' in cfg.pdk:
-		LayoutDimension.set_iu_scale(cfg.pdk.scale)
+	# Context for the scale of this config
+	ctx = LayoutContext(cfg.pdk.scale if 'scale' in cfg.pdk else LayoutContext.DEFAULT_SCALE)
 
 	# Internal helper
 	def _update_node(base, key, recurse=False):
 		v = base[key]
 		if isinstance(v, int):
-			base[key] = LayoutDimension(v)
+			base[key] = ctx.Dimension(v)
 		elif recurse and isinstance(v, (dict, ConfigNode)):
 			for sk, sv in v.items():
 				_update_node(v, sk, True)
@@ -65,41 +67,303 @@ def config_update_for_layout(cfg):
 		else:
 			_update_node(n, entry[-1])
 
+	return ctx
+
+
+def config_hash(cfg):
+	"""Stable hash of the config content"""
+	return cfg.content_hash()
+
 
 class Layout:
 
-	def __init__(self, cfg):
+	# Version of the exported artifact format
+	ARTIFACT_VERSION = 1
+
+	# Computed state saved in the artifact (besides `glb`)
+	ARTIFACT_PLY = [
+		'ply_block_analog',
+		'ply_block',
+		'ply_mux_bot',
+		'ply_mux_top',
+		'ply_mux_bus',
+		'ply_mux_port',
+		'ply_ctrl_vspine',
+		'ply_ctrl_io_top',
+		'ply_ctrl_io_bot',
+	]
+
+	# Sub-layouts: method -> (attributes it provides, sub-layouts it needs)
+	SUB_LAYOUTS = {
+		'global_layout':      ( [ 'glb', 'vspine', 'user' ],                         [] ),
+		'user_analog_layout': ( [ 'ply_block_analog' ],                              [ 'global_layout' ] ),
+		'userif_layout':      ( [ 'ply_block', 'ply_mux_bot', 'ply_mux_top' ],       [ 'global_layout' ] ),
+		'hspine_layout':      ( [ 'ply_mux_bus', 'ply_mux_port' ],                   [ 'global_layout' ] ),
+		'vspine_layout':      ( [ 'ply_ctrl_vspine' ],                               [ 'global_layout' ] ),
+		'ctrl_layout':        ( [ 'ply_ctrl_io_top', 'ply_ctrl_io_bot' ],            [ 'global_layout', 'vspine_layout' ] ),
+		'mux_layout':         ( [ 'mux_mask' ],                                      [] ),
+	}
+
+	SUB_LAYOUT_OF = dict([ (a, m) for m, (attrs, deps) in SUB_LAYOUTS.items() for a in attrs ])
+
+	def __init__(self, cfg, check=False):
+		# Sub-layouts state
+		self._staging = []	# (sub-layout, attributes) being evaluated
+		self._failed  = {}	# sub-layout -> exception it raised
+		self._done    = set()
+		self._check   = check	# Validate each sub-layout once evaluated
+
 		# Save config
 		self.cfg = cfg
 
 		# Make sure it's ready for layout
-		config_update_for_layout(cfg)
-
-		# Sub-layouts
-		self.global_layout()
-		self.user_analog_layout()
-		self.userif_layout()
-		self.hspine_layout()
-		self.vspine_layout()
-		self.ctrl_layout()
-		self.mux_layout()
+		self.ctx = config_update_for_layout(cfg)
+
+		# Tracks / Sites alignment
+		self.align = TrackAlign(cfg)
+
+		# The global layout is cheap and validates the config (grid, mux
+		# height, ...), everything else is evaluated on first access of
+		# what it provides
+		self._sub_layout('global_layout')
+
+	def __getattr__(self, k):
+		# Only called for missing attributes, evaluate the sub-layout
+		# providing it (if any)
+		m = self.SUB_LAYOUT_OF.get(k)
+		if m is None:
+			raise AttributeError(k)
+
+		# Already computed by a sub-layout still being evaluated ?
+		for sm, attrs in self.__dict__.get('_staging', []):
+			if sm == m:
+				if k in attrs:
+					return attrs[k]
+				raise AttributeError(k)
+
+		self._sub_layout(m)
+
+		return self.__dict__[k]
+
+	def __setattr__(self, k, v):
+		if getattr(self, '_readonly', False):
+			raise AttributeError(f'Layout loaded from artifact is read-only (setting {k})')
+
+		# Attributes of a sub-layout are only published once it completes
+		m = self.SUB_LAYOUT_OF.get(k)
+		for sm, attrs in self.__dict__.get('_staging', []):
+			if sm == m:
+				attrs[k] = v
+				return
+
+		super().__setattr__(k, v)
+
+	def _sub_layout(self, m):
+		if m in self._done:
+			return
+
+		# Failures are sticky
+		if m in self._failed:
+			raise self._failed[m]
+
+		# Dependencies first
+		for d in self.SUB_LAYOUTS[m][1]:
+			self._sub_layout(d)
+
+		# Evaluate
+		attrs = {}
+		self._staging.append( (m, attrs) )
+
+		try:
+			getattr(self, m)()
+			if self._check:
+				self._check_raise(self._check_errors(m))
+		except Exception as e:
+			self._failed[m] = e
+			raise
+		finally:
+			self._staging.pop()
+
+		# Publish
+		self.__dict__.update(attrs)
+		self._done.add(m)
+
+	def hspine_tracks(self):
+		"""Number of horizontal tracks the mux must fit for the spine"""
+		return self.user.iw + self.user.ow + 6 + 1 + 3
+
+	def evaluate_all(self):
+		"""Evaluates all sub-layouts now"""
+		for m in self.SUB_LAYOUTS:
+			self._sub_layout(m)
+		return self
+
+	def check(self):
+		"""
+		Validates all the pin tables: pins must be on the track grid, inside
+		the element they belong to (accounting for the pin width and the
+		power gate offset), on distinct tracks, and the spine mappings must
+		be consistent. Raises RuntimeError listing all violations.
+
+		This evaluates all sub-layouts, use `Layout(cfg, check=True)` to
+		rather validate each one when it's evaluated.
+		"""
+		self.evaluate_all()
+		self._check_raise(sum([ self._check_errors(m) for m in self.SUB_LAYOUTS ], []))
+		return self
+
+	@staticmethod
+	def _check_raise(errors):
+		if errors:
+			raise RuntimeError('Layout check failed:\n  ' + '\n  '.join(errors))
+
+	def _check_errors(self, m):
+		"""List of violations in the pin tables provided by sub-layout `m`"""
+		glb = self.glb
+		vl  = self.cfg.tt.spine.vlayer
+		hl  = self.cfg.tt.spine.hlayer
+
+		pg_ofs = glb.pg_vdd.offset + glb.pg_vaa.offset
+
+		tables = [
+			# Table              Layer Axis  Low limit       High limit         Wide pins
+			( 'ply_block_analog', vl,  'x',  pg_ofs,         glb.block.width,   True  ),
+			( 'ply_block',        vl,  'x',  pg_ofs,         glb.block.width,   False ),
+			( 'ply_mux_bot',      vl,  'x',  0,              glb.mux.width,     False ),
+			( 'ply_mux_top',      vl,  'x',  0,              glb.mux.width,     False ),
+			( 'ply_mux_bus',      hl,  'y',  0,              glb.mux.height,    False ),
+			( 'ply_mux_port',     hl,  'y',  0,              glb.mux.height,    False ),
+			( 'ply_ctrl_vspine',  vl,  'x',  0,              glb.ctrl.width,    False ),
+			( 'ply_ctrl_io_top',  vl,  'x',  0,              glb.ctrl.width,    False ),
+			( 'ply_ctrl_io_bot',  vl,  'x',  0,              glb.ctrl.width,    False ),
+		]
 
-	def _align(self, v, layer, dir_, ceil=False):
-		# Grab config data for tracks / sites
-		tp = self.cfg.pdk.tracks[layer][dir_].pitch
-		s  = {
-			'x': self.cfg.pdk.site.width,
-			'y': self.cfg.pdk.site.height,
-		}[dir_]
+		errors = []
+
+		# Per table checks
+		for name, layer, axis, lo, hi, wide in tables:
+			if self.SUB_LAYOUT_OF[name] != m:
+				continue
+
+			hw = PIN_WIDTH * (PIN_WIDE if wide else 1) // 2
+
+			tbl = getattr(self, name)
+			if not len(tbl):
+				continue
+
+			tracks = tbl.tracks()
+			offset, pitch = self.align.tracks[(layer, axis)]
+
+			off_grid = [ pn for pn, r in zip(tbl, (tracks - offset) % pitch) if r ]
+			if off_grid:
+				errors.append(f'{name:s}: {len(off_grid):d} pin(s) off the {layer:s} track grid ({off_grid[0]:s}, ...)')
+
+			if (tracks.min() - hw < lo) or (tracks.max() + hw > hi):
+				errors.append(f'{name:s}: pins span [{tracks.min() - hw:d}, {tracks.max() + hw:d}] outside of [{lo:d}, {hi:d}]')
+
+			if len(set(tracks.nm)) != len(tracks):
+				errors.append(f'{name:s}: several pins on the same track')
+
+		# Horizontal spine uses a subset of the vertical spine port tracks
+		if m == 'hspine_layout':
+			if not set(self.ply_mux_bus.tracks().nm) <= set(self.ply_mux_port.tracks().nm):
+				errors.append('ply_mux_bus: pins not facing a ply_mux_port pin')
+
+		# Vertical spine bus widths must match on both ends
+		for name in [ 'ply_mux_port', 'ply_ctrl_vspine' ]:
+			if self.SUB_LAYOUT_OF[name] != m:
+				continue
+			for bus in [ 'spine_ow', 'spine_iw' ]:
+				w = self.vspine[bus[-2:]]
+				bits = sorted([ b for b, t in getattr(self, name).bus(bus) ])
+				if bits != list(range(w)):
+					errors.append(f'{name:s}: {bus:s} has {len(bits):d} bits instead of {w:d}')
+
+		# Controller IO pads can't share tracks with the vertical spine
+		if m == 'ctrl_layout':
+			vspine_tracks = set(self.ply_ctrl_vspine.tracks().nm)
+			for name in [ 'ply_ctrl_io_top', 'ply_ctrl_io_bot' ]:
+				if vspine_tracks & set(getattr(self, name).tracks().nm):
+					errors.append(f'{name:s}: pins on vertical spine tracks')
+
+		return errors
+
+	def export(self):
+		"""Returns all the computed state as a JSON serializable dict"""
+		self.evaluate_all()
+
+		def _plain(n):
+			if isinstance(n, (LayoutNode, ConfigNode)):
+				items = n._dat.items() if isinstance(n, LayoutNode) else n.items()
+				return dict([ (k, _plain(v)) for k, v in items ])
+			return int(n)
+
+		rv = {
+			'version':  self.ARTIFACT_VERSION,
+			'config':   config_hash(self.cfg),
+			'glb':      _plain(self.glb),
+			'vspine':   _plain(self.vspine),
+			'user':     _plain(self.user),
+			'mux_mask': self.mux_mask,
+		}
+
+		for k in self.ARTIFACT_PLY:
+			rv[k] = dict([ (p, int(t)) for p, t in getattr(self, k).items() ])
 
-		# Align to LCM
-		a = math.lcm(tp, s)
+		return rv
 
-		# Do alignement
-		if ceil:
-			v += a - 1
+	def save(self, fn):
+		with open(fn, 'w') as fh:
+			json.dump(self.export(), fh, indent=1)
+
+	@classmethod
+	def load(kls, cfg, fn):
+		"""
+		Rebuilds a read-only Layout from an artifact written by `save`
+		without recomputing anything. The artifact must have been generated
+		from the same config.
+		"""
+		with open(fn, 'r') as fh:
+			data = json.load(fh)
+
+		if data.get('version') != kls.ARTIFACT_VERSION:
+			raise RuntimeError(f'Layout artifact {fn} has unsupported version {data.get("version")}')
+
+		# Config must be ready for layout first so the hash is comparable
+		ctx = config_update_for_layout(cfg)
+
+		if data['config'] != config_hash(cfg):
+			raise RuntimeError(f'Layout artifact {fn} was generated from a different config')
+
+		# Create object without running the layout
+		def _dims(n):
+			if isinstance(n, dict):
+				return dict([ (k, _dims(v)) for k, v in n.items() ])
+			return ctx.Dimension(n)
+
+		self = kls.__new__(kls)
+		self._staging = []
+		self._failed  = {}
+		self.cfg      = cfg
+		self.ctx      = ctx
+		self.align    = TrackAlign(cfg)
+		self.glb      = LayoutNode(_dims(data['glb']), ctx)
+		self.vspine   = ConfigNode(data['vspine'])
+		self.user     = ConfigNode(data['user'])
+		self.mux_mask = data['mux_mask']
+		self._check   = False
+
+		for k in kls.ARTIFACT_PLY:
+			setattr(self, k, PinTable.from_dict(dict([ (p, ctx.Dimension(t)) for p, t in data[k].items() ])))
+
+		self._done     = set(kls.SUB_LAYOUTS)
+		self._readonly = True
+
+		return self
 
-		return int(v // a) * a
+	def _align(self, v, layer, dir_, ceil=False):
+		# Align to LCM of track pitch and site size
+		return self.align.site(v, layer, dir_, ceil)
 
 	def _align_x(self, x, ceil=False):
 		return self._align(x, self.cfg.tt.spine.vlayer, 'x')
@@ -116,17 +380,17 @@ class Layout:
 			raise RuntimeError("Grid Y must be even")
 
 		# Main object
-		self.glb = glb = LayoutNode()
-
-		glb.margin = LayoutNode()
-		glb.top    = LayoutNode()
-		glb.branch = LayoutNode()
-		glb.block  = LayoutNode()
-		glb.mux    = LayoutNode()
-		glb.ctrl   = LayoutNode()
-		glb.pg_vdd = LayoutNode()
-		glb.pg_vaa = LayoutNode()
-		glb.logo   = LayoutNode()
+		self.glb = glb = LayoutNode(ctx=self.ctx)
+
+		glb.margin = {}
+		glb.top    = {}
+		glb.branch = {}
+		glb.block  = {}
+		glb.mux    = {}
+		glb.ctrl   = {}
+		glb.pg_vdd = {}
+		glb.pg_vaa = {}
+		glb.logo   = {}
 
 		# Size of the various busses
 		self.vspine = ConfigNode({
@@ -204,10 +468,8 @@ class Layout:
 		glb.top.pos_y = self._align_y((self.cfg.pdk.die.height - glb.top.height) // 2)
 
 			# Check mux is high enough for horizontal spine
-		hspine_tracks = self.user.iw + self.user.ow + 6 + 1 + 3
-
 		hti = self.cfg.pdk.tracks[self.cfg.tt.spine.hlayer]
-		if glb.mux.height < (hspine_tracks * hti.y.pitch):
+		if glb.mux.height < (self.hspine_tracks() * hti.y.pitch):
 			raise RuntimeError("Mux too small for Horizontal Spine")
 
 		# Power gates
@@ -239,7 +501,7 @@ class Layout:
 
 				# Normal signals
 				else:
-					rv.append(n)
+					rv.append( (n, None) )
 
 			# [n-1:0] range ?
 			elif type(c) is int:
@@ -251,7 +513,7 @@ class Layout:
 				# Normal signals
 				else:
 					for i in range(c-1, -1, -1):
-						rv.append(n + '[' + str(i) + ']')
+						rv.append( (n, i) )
 
 			# [o+n-1:o] offset range ?
 			elif type(c) is tuple:
@@ -263,7 +525,7 @@ class Layout:
 				# Normal signals
 				else:
 					for i in range(c[0]+c[1]-1, c[0]-1, -1):
-						rv.append(n + '[' + str(i) + ']')
+						rv.append( (n, i) )
 
 			# ???
 			else:
@@ -276,38 +538,67 @@ class Layout:
 		t_offset = self.cfg.pdk.tracks[layer][axis].offset
 		t_pitch  = self.cfg.pdk.tracks[layer][axis].pitch
 
-		# Generate tracks in the interval
-		p = (((start - t_offset) // t_pitch) * t_pitch) + t_offset
-		if p < 0:
-			p = t_offset
+		return self._ply_tracks(n_pins, start, end, step, t_offset, t_pitch)
 
-		tracks = []
-		while p < end:
-			tracks.append(p)
-			p += t_pitch
+	def _ply_tracks(self, n_pins, start, end, step, t_offset, t_pitch):
+		# First track in the interval and number of tracks
+		p0 = TrackAlign.snap(start, t_pitch, t_offset)
+		if p0 < 0:
+			p0 = t_offset
+
+		n_tracks = max(0, (end - p0 + t_pitch - 1) // t_pitch)
 
 		# Pick step if need be
 		if n_pins == 1:
 			step = 1
 
 		if step <= 0:
-			step = (len(tracks) - 1) // (n_pins - 1)
+			step = (n_tracks - 1) // (n_pins - 1)
 
 		if step == 0:
 			raise RuntimeError('Too many tracks to fit in too small area ...')
 
 		# Pick the center tracks
+		# (slicing a range has the same semantic as slicing the track list)
 		tracks_needed = (n_pins - 1) * step + 1
-		i_start = (len(tracks) - tracks_needed) // 2
+		i_start = (n_tracks - tracks_needed) // 2
 		i_end   = i_start + tracks_needed
 
-		return tracks[i_start:i_end:step]
+		idx = range(n_tracks)[i_start:i_end:step]
+
+		return LayoutDimensionArray.arange(
+			p0 + idx.start * t_pitch,
+			p0 + idx.stop  * t_pitch,
+			idx.step * t_pitch,
+		)
+
+	def _ply_distribute_batch(self, reqs):
+		"""
+		Distributes several pin groups, possibly on different layers / axes,
+		in one call. Each request is a dict of `_ply_distribute` arguments.
+		Returns the list of track lists, in the same order.
+		"""
+		tracks_cfg = {}
+		rv = []
+
+		for r in reqs:
+			layer = r.get('layer', 'met4')
+			axis  = r.get('axis',  'x')
+
+			tc = tracks_cfg.get( (layer, axis) )
+			if tc is None:
+				t = self.cfg.pdk.tracks[layer][axis]
+				tc = tracks_cfg[(layer, axis)] = (t.offset, t.pitch)
+
+			rv.append(self._ply_tracks(r['n_pins'], r['start'], r['end'], r.get('step', 0), *tc))
+
+		return rv
 
 	def _ply_finalize(self, pins, tracks):
 		if len(pins) != len(tracks):
 			raise RuntimeError('Mismatch pin/track list')
 
-		return dict([(p,t) for p,t in zip(pins, tracks) if p is not None])
+		return PinTable(pins, tracks)
 
 	def user_analog_layout(self):
 		# Pin Layouts
@@ -371,25 +662,26 @@ class Layout:
 			raise RuntimeError('Mux and Block pin layout mismatch !')
 
 		# Get tracks
-		tracks_pg = self._ply_distribute(
-			n_pins = 2,
-			start  = self.glb.margin.x,
-			end    = self.glb.pg_vdd.width - self.glb.margin.x,
-			step   = 0,
-			layer  = self.cfg.tt.spine.vlayer,
-			axis   = 'x',
-		)
-
-		tracks_um = self._ply_distribute(
-			n_pins = len(block_ply_e) - 2,
-			start  = self.glb.pg_vdd.offset + self.glb.pg_vaa.offset + self.glb.margin.x,
-			end    = self.glb.block.width - self.glb.margin.x,
-			step   = 0,
-			layer  = self.cfg.tt.spine.vlayer,
-			axis   = 'x',
-		)
+		tracks_pg, tracks_um = self._ply_distribute_batch([
+			dict(
+				n_pins = 2,
+				start  = self.glb.margin.x,
+				end    = self.glb.pg_vdd.width - self.glb.margin.x,
+				step   = 0,
+				layer  = self.cfg.tt.spine.vlayer,
+				axis   = 'x',
+			),
+			dict(
+				n_pins = len(block_ply_e) - 2,
+				start  = self.glb.pg_vdd.offset + self.glb.pg_vaa.offset + self.glb.margin.x,
+				end    = self.glb.block.width - self.glb.margin.x,
+				step   = 0,
+				layer  = self.cfg.tt.spine.vlayer,
+				axis   = 'x',
+			),
+		])
 
-		tracks = tracks_pg + tracks_um
+		tracks = LayoutDimensionArray.concat(tracks_pg, tracks_um)
 
 		# Create pins for user blocks
 		self.ply_block = self._ply_finalize(block_ply_e, tracks)
@@ -401,10 +693,12 @@ class Layout:
 
 		for i in range(self.cfg.tt.grid.x // 2):
 			ofs = self.glb.block.pitch * (self.cfg.tt.grid.x // 2 - i - 1)
-			mux_tracks.extend([x+ofs for x in tracks])
+			mux_tracks.append(tracks + ofs)
 			mux_ply_bot.extend(self._ply_expand(mux_ply(i*2+1)))
 			mux_ply_top.extend(self._ply_expand(mux_ply(i*2+0)))
 
+		mux_tracks = LayoutDimensionArray.concat(*mux_tracks)
+
 		self.ply_mux_bot = self._ply_finalize(mux_ply_bot, mux_tracks)
 		self.ply_mux_top = self._ply_finalize(mux_ply_top, mux_tracks)
 
@@ -508,7 +802,7 @@ class Layout:
 			rv = []
 			for t, ts, te in l:
 				if ts is None:
-					rv.append(t)
+					rv.append( (t, None) )
 					continue
 
 				if te is None:
@@ -520,15 +814,15 @@ class Layout:
 
 				for ti in indexes:
 					if t == 'i':
-						rv.append(f'pad_ui_in[{ti:d}]')
+						rv.append( ('pad_ui_in', ti) )
 
 					elif t == 'o':
-						rv.append(f'pad_uo_out[{ti:d}]')
+						rv.append( ('pad_uo_out', ti) )
 
 					elif t == 'io':
-						rv.append(f'pad_uio_oex[{ti:d}]')
-						rv.append(f'pad_uio_out[{ti:d}]')
-						rv.append(f'pad_uio_in[{ti:d}]')
+						rv.append( ('pad_uio_oex', ti) )
+						rv.append( ('pad_uio_out', ti) )
+						rv.append( ('pad_uio_in',  ti) )
 			return rv
 
 		bot_pads = expand(bot_pads)
@@ -544,27 +838,31 @@ class Layout:
 		tr_pads = top_pads[ts:]
 
 		# Assign tracks
-		def spread(ply, ll, hl):
-			tracks = self._ply_distribute(
+		limit_left  = self.ply_ctrl_vspine.min()
+		limit_right = self.ply_ctrl_vspine.max()
+
+		groups = [
+			( tl_pads, 0,           limit_left ),
+			( bl_pads, 0,           limit_left ),
+			( tr_pads, limit_right, self.glb.ctrl.width ),
+			( br_pads, limit_right, self.glb.ctrl.width ),
+		]
+
+		tracks = self._ply_distribute_batch([
+			dict(
 				n_pins = len(ply),
 				start  = ll,
 				end    = hl,
 				step   = 2,
 				layer  = self.cfg.tt.spine.vlayer,
 				axis   = 'x',
-			)
-
-			return self._ply_finalize(ply, tracks)
+			) for ply, ll, hl in groups
+		])
 
-		limit_left  = min(self.ply_ctrl_vspine.values())
-		limit_right = max(self.ply_ctrl_vspine.values())
+		tl, bl, tr, br = [ self._ply_finalize(g[0], t) for g, t in zip(groups, tracks) ]
 
-		self.ply_ctrl_io_top = {}
-		self.ply_ctrl_io_bot = {}
-		self.ply_ctrl_io_top.update( spread(tl_pads, 0,           limit_left) )
-		self.ply_ctrl_io_bot.update( spread(bl_pads, 0,           limit_left) )
-		self.ply_ctrl_io_top.update( spread(tr_pads, limit_right, self.glb.ctrl.width) )
-		self.ply_ctrl_io_bot.update( spread(br_pads, limit_right, self.glb.ctrl.width) )
+		self.ply_ctrl_io_top = PinTable.merge(tl, tr)
+		self.ply_ctrl_io_bot = PinTable.merge(bl, br)
 
 	def mux_layout(self):
 		# Generate list of masked muxes
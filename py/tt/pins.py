@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+#
+# Tiny Tapeout
+#
+# Pin tables
+#
+# Copyright (c) 2026 agent <agent@local>
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import sys
+
+from array import array
+from collections.abc import Mapping
+
+from .utils import *
+
+
+__all__ = [ 'PinTable', 'PIN_WIDTH', 'PIN_LENGTH', 'PIN_WIDE' ]
+
+
+# Pin geometry (in nm), wide pins (analog) are PIN_WIDE times wider
+PIN_WIDTH  = 300
+PIN_LENGTH = 1000
+PIN_WIDE   = 3
+
+
+class PinTable(Mapping):
+	"""
+	Compact, read-only table of pin name -> track position.
+
+	Pins are stored as parallel arrays of bus id, bit index (-1 for single
+	signals) and track coordinate (in nm) with bus names interned once, so
+	the `name[bit]` strings are only created when iterating over names.
+
+	It can be used as a plain dict (`tbl['um_ow[12]']`, `.items()`, ...)
+	and also supports direct lookups by bus / bit (`tbl.track('ua', 3)`)
+	and bus range queries (`tbl.bus('spine_ow')`) without any string
+	formatting or parsing.
+	"""
+
+	__slots__ = [ '_names', '_ids', '_bus', '_bit', '_track', '_index', '_dim' ]
+
+	def __init__(self, pins=(), tracks=()):
+		"""
+		`pins` is a list of (bus name, bit index or None) with None entries
+		for unused tracks. `tracks` has the matching positions (list or
+		LayoutDimensionArray).
+		"""
+		self._names = []		# bus id -> bus name
+		self._ids   = {}		# bus name -> bus id
+		self._bus   = array('H')
+		self._bit   = array('h')
+		self._track = array('q')
+		self._index = {}		# bus id -> { bit -> pin index }
+		self._dim   = LayoutDimension
+
+		# Arrays give their raw values (and context) directly
+		if isinstance(tracks, LayoutDimensionArray):
+			self._dim = tracks.ctx.Dimension
+			tracks    = tracks.nm
+
+		for p, t in zip(pins, tracks):
+			if p is None:
+				continue
+			self._append(p[0], p[1], t)
+
+	@classmethod
+	def from_dict(kls, d):
+		"""Builds a table from a plain dict of `name[bit]` -> track"""
+		return kls([ kls._split(n) for n in d.keys() ], list(d.values()))
+
+	@classmethod
+	def merge(kls, *tables):
+		"""Concatenation of several tables (in order)"""
+		rv = kls()
+		for tbl in tables:
+			for bid, bit, t in zip(tbl._bus, tbl._bit, tbl._track):
+				rv._append(tbl._names[bid], None if bit < 0 else bit, tbl._dim(t))
+		return rv
+
+	@staticmethod
+	def _split(name):
+		bus, _, bit = name.partition('[')
+		return (bus, int(bit[:-1]) if bit else None)
+
+	def _append(self, bus, bit, track):
+		bid = self._ids.get(bus)
+		if bid is None:
+			bid = self._ids[bus] = len(self._names)
+			self._names.append(sys.intern(bus))
+			self._index[bid] = {}
+
+		if isinstance(track, LayoutDimension):
+			self._dim = track.__class__
+
+		self._index[bid][-1 if bit is None else bit] = len(self._track)
+		self._bus.append(bid)
+		self._bit.append(-1 if bit is None else bit)
+		self._track.append(int(track))
+
+	def _name(self, i):
+		bit = self._bit[i]
+		bus = self._names[self._bus[i]]
+		return bus if bit < 0 else f'{bus:s}[{bit:d}]'
+
+	def _lookup(self, bus, bit):
+		bid = self._ids.get(bus)
+		if bid is None:
+			return None
+		return self._index[bid].get(-1 if bit is None else bit)
+
+	# Mapping interface
+	def __getitem__(self, name):
+		i = self._lookup(*self._split(name))
+		if i is None:
+			raise KeyError(name)
+		return self._dim(self._track[i])
+
+	def __contains__(self, name):
+		return self._lookup(*self._split(name)) is not None
+
+	def __len__(self):
+		return len(self._track)
+
+	def __iter__(self):
+		return map(self._name, range(len(self._track)))
+
+	def values(self):
+		return self.tracks()
+
+	def items(self):
+		return zip(self, self.tracks())
+
+	def __repr__(self):
+		return 'PinTable({' + ', '.join([f'{n!r}: {int(t):d}' for n, t in self.items()]) + '})'
+
+	# Direct queries
+	def track(self, bus, bit=None):
+		"""Track position of a pin given by bus name and bit index"""
+		i = self._lookup(bus, bit)
+		if i is None:
+			raise KeyError(bus if bit is None else f'{bus:s}[{bit:d}]')
+		return self._dim(self._track[i])
+
+	def tracks(self):
+		"""All track positions (in table order)"""
+		return LayoutDimensionArray(self._track.tolist(), self._dim.ctx)
+
+	def buses(self):
+		"""Names of all the buses (in order of first appearance)"""
+		return list(self._names)
+
+	def bus(self, bus, lo=None, hi=None):
+		"""
+		Returns the (bit, track) pairs of a bus, ordered as in the table,
+		optionally restricted to the bit indexes lo..hi (inclusive)
+		"""
+		bid = self._ids.get(bus)
+		if bid is None:
+			raise KeyError(bus)
+
+		lo = -1 if lo is None else lo
+		hi = (1 << 15) if hi is None else hi
+
+		return [
+			(bit, self._dim(self._track[i]))
+				for bit, i in self._index[bid].items()
+					if lo <= bit <= hi
+		]
+
+	def min(self):
+		return self._dim(min(self._track))
+
+	def max(self):
+		return self._dim(max(self._track))
@@ -11,10 +11,115 @@
 
 from collections import namedtuple
 
+import bisect
+import contextlib
+import json
+import math
+import os
+import pickle
+import random
+import time
+
 import yaml
 
+from .utils import ConfigNode
+
+
+__all__ = [ 'CapacityCheck', 'ModuleSlot', 'ModulePlacer', 'PlacementReport' ]
+
+
+class CapacityCheck(namedtuple('CapacityCheck', 'name required available')):
 
-__all__ = [ 'ModuleSlot', 'ModulePlacer' ]
+	__slots__ = []
+
+	@property
+	def deficit(self):
+		return max(self.required - self.available, 0)
+
+
+class PlacementReport:
+	"""
+	Collects timing and search statistics of a placement run (phases,
+	anchors probed, rejections by reason, per module attempts) so they can
+	be dumped as JSON to tune or debug slow / failed placements.
+
+	When a report is attached to the placer, the search probes candidate
+	anchors one by one (in the same order the indexed search would pick
+	them) so every rejection is accounted for. Results are identical, it's
+	just slower.
+	"""
+
+	REASONS = [ 'missing_mux', 'not_facing_missing', 'out_of_grid', 'occupied', 'crosses_midline' ]
+
+	def __init__(self):
+		self.phases  = {}
+		self.modules = {}
+		self.analog  = {}
+		self.failed  = []
+
+	@contextlib.contextmanager
+	def phase(self, name):
+		t = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.phases[name] = self.phases.get(name, 0.0) + (time.perf_counter() - t)
+
+	def module(self, mod, kind=None):
+		rec = self.modules.get(mod.name)
+		if rec is None:
+			rec = self.modules[mod.name] = {
+				'kind':     kind,
+				'size':     [ mod.width, mod.height ],
+				'attempts': [],
+			}
+		elif kind is not None:
+			rec['kind'] = kind
+		return rec
+
+	def attempt(self, mod, pass_name):
+		att = {
+			'pass':     pass_name,
+			'probed':   0,
+			'rejected': dict([ (r, 0) for r in self.REASONS ]),
+			'result':   None,
+			'time':     0.0,
+		}
+		self.module(mod)['attempts'].append(att)
+		return att
+
+	def as_dict(self):
+		# Global counters
+		probed   = 0
+		rejected = dict([ (r, 0) for r in self.REASONS ])
+		kinds    = {}
+
+		for rec in self.modules.values():
+			for att in rec['attempts']:
+				# Analog group assignment attempts have no grid search
+				if 'probed' not in att:
+					continue
+
+				probed += att['probed']
+				for r, n in att['rejected'].items():
+					rejected[r] += n
+
+				k = kinds.setdefault(rec['kind'] or 'unknown', {})
+				k[att['pass']] = k.get(att['pass'], 0.0) + att['time']
+
+		return {
+			'phases':   self.phases,
+			'kinds':    kinds,
+			'probed':   probed,
+			'rejected': rejected,
+			'failed':   self.failed,
+			'analog':   self.analog,
+			'modules':  self.modules,
+		}
+
+	def save(self, fn):
+		with open(fn, 'w') as fh:
+			json.dump(self.as_dict(), fh, indent=2, sort_keys=True)
 
 
 class ModuleSlot:
@@ -33,6 +138,10 @@ class ModuleSlot:
 		if self.pg_vdd is True:
 			self.pg_vdd = 'hp' if self.width > 4 else 'll'
 
+		# Cached logical position (and the physical one it matches)
+		self._lpos     = None
+		self._lpos_key = None
+
 		if ((self.pos_x is None) and (self.pos_y is None) and
 		        ('mux_id' in cfg_data) and ('blk_id' in cfg_data)):
 			self.pos_x, self.pos_y = self.placer.l2p(cfg_data['mux_id'], cfg_data['blk_id'])
@@ -51,13 +160,22 @@ class ModuleSlot:
 			'analog': self.analog,
 		}
 
+	@property
+	def lpos(self):
+		# Only re-compute if the physical position changed
+		key = (self.pos_x, self.pos_y)
+		if self._lpos_key != key:
+			self._lpos     = self.placer.p2l(self.pos_x, self.pos_y)
+			self._lpos_key = key
+		return self._lpos
+
 	@property
 	def mux_id(self):
-		return self.placer.p2l(self.pos_x, self.pos_y)[0]
+		return self.lpos[0]
 
 	@property
 	def blk_id(self):
-		return self.placer.p2l(self.pos_x, self.pos_y)[1]
+		return self.lpos[1]
 
 	@property
 	def pg_vdd_module(self):
@@ -82,11 +200,21 @@ class ModuleSlot:
 
 class ModulePlacer:
 
-	def __init__(self, cfg, mod_file, verbose=False):
-		# Save config
-		self.cfg = cfg
+	def __init__(self, cfg, mod_file, verbose=False, previous=None, optimize=None, jobs=None, place=True, analog_balance=False, report=None):
+		# Save config (frozen view, it's read in all the hot loops)
+		self.cfg = cfg.freeze() if isinstance(cfg, ConfigNode) else cfg
 		self.verbose = verbose
 
+		# Optional PlacementReport collecting statistics
+		self.report = report
+
+		# Use global balanced assignment for analog modules
+		self.analog_balance = analog_balance
+
+		# Optimizer options (time budget in seconds / number of processes)
+		self.optimize = optimize
+		self.jobs = jobs or os.cpu_count() or 1
+
 		# Current place mode
 		self.missing_fill = False
 
@@ -107,10 +235,21 @@ class ModulePlacer:
 				self.mux_missing.add(mux_id)
 
 		# Run placement
+		self.gen_luts()
 		self.gen_grid()
 		self.load_modules(mod_file)
+
+		if previous is not None:
+			self.load_previous(previous)
+
+		if not place:
+			return
+
 		self.place_modules()
 
+		if previous is not None:
+			self.diff_previous()
+
 	def gen_y_candidates(self):
 		# Start length
 		N = self.cfg.tt.grid.y
@@ -146,12 +285,25 @@ class ModulePlacer:
 	def gen_grid(self):
 		self.lgrid = {}
 		self.pgrid = {}
-		self.pgrid_free = set()
-		for y in range(self.cfg.tt.grid.y):
-			for x in range(self.cfg.tt.grid.x):
-				self.pgrid_free.add( (x, y) )
 
-	def p2l(self, pos_x, pos_y):
+		# Occupancy bitmap, one row per Y, 0 = free / 1 = used
+		self.pgrid_used = [ bytearray(self.cfg.tt.grid.x) for y in range(self.cfg.tt.grid.y) ]
+
+		# Index of legal anchors for auto-placement
+		self.anchors = AnchorIndex(self)
+
+	def gen_luts(self):
+		# Dense lookup tables for all position conversions, indexed
+		# by `y * grid.x + x` or `mux_id * grid.x + blk_id`
+		# (there are exactly grid.y muxes of grid.x blocks)
+		self._lut_gx = gx = self.cfg.tt.grid.x
+		self._lut_gy = gy = self.cfg.tt.grid.y
+
+		self._lut_p2l   = [ self._p2l(x, y)   for y in range(gy) for x in range(gx) ]
+		self._lut_l2p   = [ self._l2p(m, b)   for m in range(gy) for b in range(gx) ]
+		self._lut_la2ld = [ self._la2ld(m, b) for m in range(gy) for b in range(gx) ]
+
+	def _p2l(self, pos_x, pos_y):
 		# Grid dimensions
 		gx = self.cfg.tt.grid.x
 		gy = self.cfg.tt.grid.y
@@ -173,7 +325,7 @@ class ModulePlacer:
 
 		return mux_id, blk_id
 
-	def l2p(self, mux_id, blk_id):
+	def _l2p(self, mux_id, blk_id):
 		# Grid dimensions
 		gx = self.cfg.tt.grid.x
 		gy = self.cfg.tt.grid.y
@@ -188,11 +340,7 @@ class ModulePlacer:
 
 		return pos_x, pos_y
 
-	def la2ld(self, amux_id, ablk_id):
-		"""
-		Converts a logical position on an 'analog mux' to the matching position
-		on a 'digital mux' where the module actually is located
-		"""
+	def _la2ld(self, amux_id, ablk_id):
 		# Side toward or away from controller
 		if ablk_id & 1:
 			# Away from the controller
@@ -213,6 +361,39 @@ class ModulePlacer:
 
 		return dmux_id, dblk_id
 
+	def p2l(self, pos_x, pos_y):
+		if (0 <= pos_x < self._lut_gx) and (0 <= pos_y < self._lut_gy):
+			return self._lut_p2l[pos_y * self._lut_gx + pos_x]
+		return self._p2l(pos_x, pos_y)
+
+	def l2p(self, mux_id, blk_id):
+		if (0 <= mux_id < self._lut_gy) and (0 <= blk_id < self._lut_gx):
+			return self._lut_l2p[mux_id * self._lut_gx + blk_id]
+		return self._l2p(mux_id, blk_id)
+
+	def p2l_many(self, pos_list):
+		"""
+		Converts a list of (pos_x, pos_y) physical positions to a list
+		of (mux_id, blk_id) logical positions
+		"""
+		return [ self.p2l(x, y) for x, y in pos_list ]
+
+	def l2p_many(self, lpos_list):
+		"""
+		Converts a list of (mux_id, blk_id) logical positions to a list
+		of (pos_x, pos_y) physical positions
+		"""
+		return [ self.l2p(m, b) for m, b in lpos_list ]
+
+	def la2ld(self, amux_id, ablk_id):
+		"""
+		Converts a logical position on an 'analog mux' to the matching position
+		on a 'digital mux' where the module actually is located
+		"""
+		if (0 <= amux_id < self._lut_gy) and (0 <= ablk_id < self._lut_gx):
+			return self._lut_la2ld[amux_id * self._lut_gx + ablk_id]
+		return self._la2ld(amux_id, ablk_id)
+
 	def ld2la(self, dmux_id, dblk_id):
 		"""
 		Converts a logical position on an 'digital mux' to the matching position
@@ -252,6 +433,109 @@ class ModulePlacer:
 				):
 				raise RuntimeError(f"Module '{mod.name:s}' has invalid Y position {mod.pos_y:d}")
 
+	def load_previous(self, prev_file):
+		"""
+		Loads a previous placement result and pins every unchanged module
+		to the position it had there, so only new or modified modules
+		actually need to be placed
+		"""
+		# Load raw data from YAML
+		with open(prev_file, 'r') as fh:
+			data = yaml.load(fh, Loader=yaml.FullLoader)
+
+		# Index by name (names could be repeated, match them in order)
+		self.previous = {}
+		for pm in data['modules']:
+			self.previous.setdefault(pm['name'], []).append(pm)
+
+		# Match with current modules
+		self.previous_match = {}
+
+		prev_avail = dict([(k, list(v)) for k, v in self.previous.items()])
+
+		# Sites taken by the modules fully constrained in the current file,
+		# an unchanged module can't be kept where it would overlap them
+		used = set()
+		for mod in self.modules:
+			if (mod.pos_x is not None) and (mod.pos_y is not None):
+				used.update(self._footprint_sites(mod, mod.pos_x, mod.pos_y))
+
+		self.previous_conflicts = []
+
+		for mod in self.modules:
+			# Find previous entry
+			pl = prev_avail.get(mod.name)
+			if not pl:
+				continue
+
+			pm = pl.pop(0)
+			self.previous_match[mod] = pm
+
+			# If the module was resized or its analog ports changed, it's
+			# considered new
+			if (pm.get('width', 1) != mod.width) or (pm.get('height', 1) != mod.height):
+				continue
+
+			if set(pm.get('analog', {}).keys()) != set(mod.analog.keys()):
+				continue
+
+			# If the module has constraints, the previous position must match
+			if (mod.pos_x is not None) and (mod.pos_x != pm['x']):
+				continue
+
+			if (mod.pos_y is not None) and (mod.pos_y != pm['y']):
+				continue
+
+			# If the previous slot isn't available anymore, place it normally
+			# (it will be reported as moved)
+			if (mod.pos_x is None) or (mod.pos_y is None):
+				sites = self._footprint_sites(mod, pm['x'], pm['y'])
+				if (not sites) or (sites & used) or not self._site_suitable(mod, pm['x'], pm['y']):
+					self.previous_conflicts.append(mod.name)
+					if self.verbose:
+						print(f"Module '{mod.name:s}' can't keep its previous position, re-placing it")
+					continue
+				used.update(sites)
+
+			# Keep the previous position (and analog pins)
+			mod.pos_x = pm['x']
+			mod.pos_y = pm['y']
+
+			for k, v in pm.get('analog', {}).items():
+				if mod.analog[k] is None:
+					mod.analog[k] = v
+
+	def diff_previous(self):
+		"""
+		Compares the placement result with the previous one and collects
+		the modules that were added / moved / removed
+		"""
+		self.changes = {
+			'added':   [],
+			'moved':   [],
+			'removed': [],
+		}
+
+		matched = set()
+
+		for mod in self.modules:
+			pm = self.previous_match.get(mod)
+
+			if pm is None:
+				self.changes['added'].append( (mod.name, None, (mod.mux_id, mod.blk_id)) )
+				continue
+
+			matched.add(id(pm))
+
+			if (pm['x'], pm['y'], pm.get('width', 1), pm.get('height', 1)) != \
+			   (mod.pos_x, mod.pos_y, mod.width, mod.height):
+				self.changes['moved'].append( (mod.name, (pm['mux_id'], pm['blk_id']), (mod.mux_id, mod.blk_id)) )
+
+		for pl in self.previous.values():
+			for pm in pl:
+				if id(pm) not in matched:
+					self.changes['removed'].append( (pm['name'], (pm['mux_id'], pm['blk_id']), None) )
+
 	def save_modules(self, mod_file):
 		data = {
 			'modules': [ m.as_dict() for m in self.modules ],
@@ -259,14 +543,141 @@ class ModulePlacer:
 		with open(mod_file, 'w') as fh:
 			fh.write(yaml.dump(data))
 
-	def _sites_for_module(self, mod, pos_x, pos_y):
+	def check_capacity(self):
+		"""
+		Fast necessary conditions for the module list to be placeable,
+		independent of the placement order. Returns a list of CapacityCheck,
+		any of them with a non-zero deficit proves placement is impossible.
+		Checks with nothing required are just informative.
+		"""
+		gx = self.cfg.tt.grid.x
+		gy = self.cfg.tt.grid.y
+		L  = gx // 2
+
+		checks = []
+
+		# Sites usable by modules of each height (empty grid, normal mode)
+		sites = {}
+		for h in [1, 2, 4]:
+			probe = ModuleSlot(self, { 'name': None, 'height': h })
+			sites[h] = set()
+			for y in range(gy):
+				for x in range(gx):
+					fp = self._footprint(probe, x, y)
+					if (fp is None) or not self._site_connectable(probe, x, y):
+						continue
+					sites[h].update([ (x, fy) for fy in range(fp[2], fp[3]) ])
+
+		usable_cache = {}
+
+		def usable(heights):
+			key = frozenset(heights)
+			if key not in usable_cache:
+				usable_cache[key] = set().union(*[sites[h] for h in key])
+			return usable_cache[key]
+
+		def area(mods):
+			return sum([m.width * m.height for m in mods])
+
+		# Per height class (any combination of them)
+		for hs in [ (1,), (2,), (4,), (1, 2), (1, 4), (2, 4), (1, 2, 4) ]:
+			mods = [ m for m in self.modules if m.height in hs ]
+			name = 'area h=' + ','.join([str(h) for h in hs])
+			checks.append(CapacityCheck(name, area(mods), len(usable(hs))))
+
+		# Per grid half (modules constrained in X)
+		for name, hx in [ ('left', lambda x: x < L), ('right', lambda x: x >= L) ]:
+			mods = [ m for m in self.modules if (m.pos_x is not None) and hx(m.pos_x) ]
+			avail = [ (x, y) for x, y in usable([1, 2, 4]) if hx(x) ]
+			checks.append(CapacityCheck(f'area {name:s} half', area(mods), len(avail)))
+
+		# Wide modules: at most k modules wider than L/(k+1) per half row
+		prev = None
+		for k in range(1, L):
+			mods = [ m for m in self.modules if m.width * (k + 1) > L ]
+			if (not mods) or (mods == prev):
+				continue
+			prev = mods
+
+			rows = set([ (x >= L, y) for x, y in usable(set([m.height for m in mods])) ])
+			checks.append(CapacityCheck(
+				f'half rows w>{L // (k+1):d}',
+				sum([m.height for m in mods]),
+				k * len(rows)
+			))
+
+		# Modules pinned to a column / row
+		for x in range(gx):
+			mods = [ m for m in self.modules if m.pos_x == x ]
+			if mods:
+				col = [ s for s in usable(set([m.height for m in mods])) if s[0] == x ]
+				checks.append(CapacityCheck(f'column {x:d}', sum([m.height for m in mods]), len(col)))
+
+		for y in range(gy):
+			mods = [ m for m in self.modules if m.pos_y == y ]
+			if mods:
+				row = [ s for s in usable(set([m.height for m in mods])) if s[1] == y ]
+				checks.append(CapacityCheck(f'row {y:d}', sum([m.width for m in mods]), len(row)))
+
+		# Per missing mux region (sites facing it, preferably for h>=2)
+		for mux_id in sorted(self.mux_missing):
+			n = 0
+			for y in range(gy):
+				for x in range(gx):
+					dmux_id, dblk_id = self.p2l(x, y)
+					if (dmux_id not in self.mux_missing) and (self.ld2la(dmux_id, dblk_id)[0] == mux_id):
+						n += 1
+			checks.append(CapacityCheck(f'mux {mux_id:d} facing sites', 0, n))
+
+		# Analog groups
+		if self.analog_ena:
+			groups = [ AnalogPinGroup(self, g) for g in self.cfg.tt.analog ]
+			analog_mods = [ m for m in self.modules if m.analog ]
+
+			for i, g in enumerate(groups):
+				# Modules bound to this group by their pre-assigned pins
+				mods = [ m for m in analog_mods if any([v in g.pins for v in m.analog.values()]) ]
+				checks.append(CapacityCheck(f'analog group {i:d} slots', sum([m.width for m in mods]), len(g.pos_all)))
+
+			checks.append(CapacityCheck(
+				'analog slots',
+				sum([m.width for m in analog_mods]),
+				sum([len(g.pos_all) for g in groups])
+			))
+
+			# Pins (they can be shared, but a module needs distinct ones)
+			max_pins  = max([len([p for p in g.pins.values() if not p.dedicated]) for g in groups])
+			need_pins = max([0] + [len([v for v in m.analog.values() if v is None]) for m in analog_mods])
+			checks.append(CapacityCheck('analog pins per module', need_pins, max_pins))
+
+		return checks
+
+	def _footprint(self, mod, pos_x, pos_y):
+		"""
+		Returns the (x0, x1, y0, y1) half-open ranges of sites covered by
+		a module anchored at the given position or None if it doesn't fit
+		in the grid
+		"""
 		sx = -1 if pos_x >= (self.cfg.tt.grid.x // 2) else 1
 		sy = -1 if ((pos_y & 1) == 0) else 1
-		for oy in range(mod.height):
-			for ox in range(mod.width):
-				yield (pos_x+sx*ox, pos_y+sy*oy)
 
-	def _site_suitable(self, mod, pos_x, pos_y):
+		x0, x1 = sorted([pos_x, pos_x + sx * (mod.width  - 1)])
+		y0, y1 = sorted([pos_y, pos_y + sy * (mod.height - 1)])
+
+		if (x0 < 0) or (x1 >= self.cfg.tt.grid.x) or (y0 < 0) or (y1 >= self.cfg.tt.grid.y):
+			return None
+
+		return x0, x1 + 1, y0, y1 + 1
+
+	def _footprint_sites(self, mod, pos_x, pos_y):
+		"""Set of (x, y) sites covered by a module anchored at the given position"""
+		fp = self._footprint(mod, pos_x, pos_y)
+		if fp is None:
+			return set()
+		x0, x1, y0, y1 = fp
+		return set([ (x, y) for y in range(y0, y1) for x in range(x0, x1) ])
+
+	def _site_connectable(self, mod, pos_x, pos_y):
 		# Check this is a connectable position
 		mux_id, blk_id = self.p2l(pos_x, pos_y)
 		if mux_id in self.mux_missing:
@@ -280,28 +691,89 @@ class ModulePlacer:
 			if not amux_id in self.mux_missing:
 				return False
 
+		return True
+
+	def _site_reject_reason(self, mod, pos_x, pos_y):
+		# Check this is a connectable position
+		mux_id, blk_id = self.p2l(pos_x, pos_y)
+		if mux_id in self.mux_missing:
+			return 'missing_mux'
+
+		if self.missing_fill or mod.height > 2:
+			amux_id, ablk_id = self.ld2la(mux_id, blk_id)
+			if not amux_id in self.mux_missing:
+				return 'not_facing_missing'
+
 		# Check all positions exist and are free
-		for (ox, oy) in self._sites_for_module(mod, pos_x, pos_y):
-			if (ox, oy) not in self.pgrid_free:
-				return False
+		fp = self._footprint(mod, pos_x, pos_y)
+		if fp is None:
+			return 'out_of_grid'
+
+		x0, x1, y0, y1 = fp
+		for y in range(y0, y1):
+			if any(self.pgrid_used[y][x0:x1]):
+				return 'occupied'
 
 		# For multi-width, check we don't cross mid boundary
 		if mod.width > 1:
 			mid_x = self.cfg.tt.grid.x // 2
 			sx = -1 if pos_x >= mid_x else 1
 			if (pos_x >= mid_x) ^ ((pos_x + sx * (mod.width - 1)) >= mid_x):
-				return False
+				return 'crosses_midline'
 
 		# All checks out
-		return True
+		return None
+
+	def _site_suitable(self, mod, pos_x, pos_y):
+		return self._site_reject_reason(mod, pos_x, pos_y) is None
+
+	def _row_suitable(self, mod, pos_y):
+		"""
+		Batch version of `_site_suitable` evaluating every X anchor of a
+		given row at once. Returns a list of booleans indexed by X.
+		"""
+		gx    = self.cfg.tt.grid.x
+		mid_x = gx // 2
+
+		# Rows covered by the footprint must exist
+		sy = -1 if ((pos_y & 1) == 0) else 1
+		y0, y1 = sorted([pos_y, pos_y + sy * (mod.height - 1)])
+
+		if (y0 < 0) or (y1 >= self.cfg.tt.grid.y):
+			return [False] * gx
+
+		# Merge occupancy of all the covered rows
+		occ = [ max(c) for c in zip(*self.pgrid_used[y0:y1+1]) ]
+
+		# Length of the free run starting at each X and extending toward
+		# the middle (which is the direction modules grow in).
+		# Runs are bounded by the middle so they can't cross it.
+		run = [0] * gx
+
+		n = 0
+		for x in range(mid_x - 1, -1, -1):
+			n = 0 if occ[x] else n + 1
+			run[x] = n
+
+		n = 0
+		for x in range(mid_x, gx):
+			n = 0 if occ[x] else n + 1
+			run[x] = n
+
+		# Connectivity only depends on the mux, so it's the same for the
+		# whole half row
+		conn_l = self._site_connectable(mod, 0,     pos_y)
+		conn_r = self._site_connectable(mod, mid_x, pos_y)
+
+		# Final result
+		return [
+			(run[x] >= mod.width) and (conn_r if x >= mid_x else conn_l)
+				for x in range(gx)
+		]
 
 	def _find_xy_for_module(self, mod):
-		# Scan the whole grid in order and check if suitable
-		for y in self.yc:
-			for x in range(self.cfg.tt.grid.x):
-				if self._site_suitable(mod, x, y):
-					return x, y
-		return None, None
+		# First suitable anchor in the whole grid, in order
+		return self.anchors.find(mod)
 
 	def _find_y_for_module(self, mod):
 		for y in self.yc:
@@ -310,11 +782,43 @@ class ModulePlacer:
 		return None, None
 
 	def _find_x_for_module(self, mod):
-		for x in range(self.cfg.tt.grid.x):
-			if self._site_suitable(mod, x, mod.pos_y):
-				return x, mod.pos_y
+		ok = self._row_suitable(mod, mod.pos_y)
+		if True in ok:
+			return ok.index(True), mod.pos_y
 		return None, None
 
+	def _find_xy_report(self, mod):
+		# Candidate anchors, in the same order as the other searches
+		gx = self.cfg.tt.grid.x
+
+		if (mod.pos_x is None) and (mod.pos_y is None):
+			cands = ( (x, y) for y in self.yc for x in range(gx) )
+		elif (mod.pos_x is None):
+			cands = ( (x, mod.pos_y) for x in range(gx) )
+		elif (mod.pos_y is None):
+			cands = ( (mod.pos_x, y) for y in self.yc )
+		else:
+			cands = [ (mod.pos_x, mod.pos_y) ]
+
+		# Probe them one by one
+		att = self.report.attempt(mod, 'missing_fill' if self.missing_fill else 'normal')
+		t = time.perf_counter()
+
+		rv = None, None
+
+		for x, y in cands:
+			att['probed'] += 1
+			reason = self._site_reject_reason(mod, x, y)
+			if reason is None:
+				att['result'] = [ x, y ]
+				rv = x, y
+				break
+			att['rejected'][reason] += 1
+
+		att['time'] = time.perf_counter() - t
+
+		return rv
+
 	def _module_placed(self, mod):
 		if (mod.pos_x is None) or (mod.pos_y is None):
 			return False
@@ -330,7 +834,9 @@ class ModulePlacer:
 			return
 
 		# Find final X, Y
-		if (mod.pos_x is None) and (mod.pos_y is None):
+		if self.report is not None:
+			x, y = self._find_xy_report(mod)
+		elif (mod.pos_x is None) and (mod.pos_y is None):
 			x, y = self._find_xy_for_module(mod)
 		elif (mod.pos_x is None):
 			x, y = self._find_x_for_module(mod)
@@ -345,6 +851,8 @@ class ModulePlacer:
 		if (x is None) or (y is None):
 			if self.missing_fill:
 				return
+			if self.report is not None:
+				self.report.failed.append(mod.name)
 			raise RuntimeError(f"Module '{mod.name:s}' couldn't be placed")
 
 		# Actually place it
@@ -355,9 +863,12 @@ class ModulePlacer:
 		self.pgrid[ (x, y) ] = mod
 		self.lgrid[ self.p2l(x, y) ] = mod
 
-		# And remove the sites from the free list
-		for (ox, oy) in self._sites_for_module(mod, x, y):
-			self.pgrid_free.remove( (ox, oy) )
+		# And mark the sites as used
+		x0, x1, y0, y1 = self._footprint(mod, x, y)
+		for oy in range(y0, y1):
+			self.pgrid_used[oy][x0:x1] = b'\x01' * (x1 - x0)
+
+		self.anchors.remove_sites(x0, x1, y0, y1)
 
 		# Debug
 		if self.verbose:
@@ -372,10 +883,13 @@ class ModulePlacer:
 			self._place_module(m)
 
 	def place_modules(self):
+		report = self.report or PlacementReport()
+
 		# Deal with analog modules first if we support analog
 		if self.analog_ena:
-			ap = AnalogPlacer(self)
-			ap.place_modules(self.modules)
+			with report.phase('analog'):
+				ap = AnalogPlacer(self, balance=self.analog_balance)
+				ap.place_modules(self.modules)
 
 		# Sort modules into 3 sets
 		full_placed = []
@@ -390,19 +904,295 @@ class ModulePlacer:
 			else:
 				auto_placed.append(m)
 
+		if self.report is not None:
+			for kind, mods in [ ('full', full_placed), ('semi', semi_placed), ('auto', auto_placed) ]:
+				for m in mods:
+					if not m.analog:
+						self.report.module(m, kind)
+
 		# Place them from most constrained to less constrained
 			# Fully placed are just checked
-		self._place_modules_group(full_placed)
+		with report.phase('full'):
+			self._place_modules_group(full_placed)
+
+			# Semi then Auto, bigger first
+		order  = sorted(semi_placed, key=lambda m: (m.height, m.width), reverse=True)
+		order += sorted(auto_placed, key=lambda m: (m.height, m.width), reverse=True)
+
+			# Try to find a better order if requested
+		if self.optimize:
+			with report.phase('optimize'):
+				order = self._optimize_order(full_placed, order)
 
-			# Semi/Auto trying to fill analog positions first
+		self._place_order(order, report=report)
+
+	def _place_order(self, mods, strict=True, report=None):
+		report = report or PlacementReport()
+
+		# Trying to fill analog positions first
 		self.missing_fill = True
-		self._place_modules_group(semi_placed)
-		self._place_modules_group(auto_placed)
+		with report.phase('missing_fill'):
+			for m in mods:
+				self._place_module(m)
 
-			# And then normal mode
+		# And then normal mode
 		self.missing_fill = False
-		self._place_modules_group(semi_placed)
-		self._place_modules_group(auto_placed)
+
+		failed = []
+		with report.phase('normal'):
+			for m in mods:
+				try:
+					self._place_module(m)
+				except RuntimeError:
+					if strict:
+						raise
+					failed.append(m)
+
+		return failed
+
+	def _snapshot(self):
+		return [ (m, m.pos_x, m.pos_y) for m in self.modules ]
+
+	def _restore(self, snap, full_placed):
+		# Reset grid & module positions and re-place the fixed ones
+		self.gen_grid()
+
+		for m, x, y in snap:
+			m.pos_x = x
+			m.pos_y = y
+
+		self._place_modules_group(full_placed)
+
+	def _placement_cost(self, failed):
+		"""
+		Cost of the current placement, ranked by (in decreasing importance):
+		 - area of the modules that couldn't be placed
+		 - number of free sites facing a missing mux
+		 - distance of the modules to the controller
+		"""
+		gx = self.cfg.tt.grid.x
+		gy = self.cfg.tt.grid.y
+
+		# Weights so each term dominates all the following ones
+		w_fill     = gx * gy * (gx + gy)
+		w_unplaced = gx * gy * w_fill
+
+		# Sites facing a missing mux
+		if not hasattr(self, '_fill_sites'):
+			self._fill_sites = []
+			for y in range(gy):
+				for x in range(gx):
+					mux_id, blk_id = self.p2l(x, y)
+					if (mux_id not in self.mux_missing) and (self.ld2la(mux_id, blk_id)[0] in self.mux_missing):
+						self._fill_sites.append( (x, y) )
+
+		# Compute all terms
+		unplaced  = sum([m.width * m.height for m in failed])
+		fill_free = sum([1 for x, y in self._fill_sites if not self.pgrid_used[y][x]])
+		dist      = sum([
+			m.width * m.height * ((m.mux_id >> 2) + (m.blk_id >> 1))
+				for m in self.pgrid.values()
+		])
+
+		return w_unplaced * unplaced + w_fill * fill_free + dist
+
+	def _order_cost(self, snap, full_placed, order):
+		self._restore(snap, full_placed)
+		failed = self._place_order(order, strict=False)
+		return self._placement_cost(failed)
+
+	def _anneal(self, full_idx, order_idx, seed, budget):
+		"""
+		Simulated annealing over the placement order of the non-fixed
+		modules, for `budget` seconds. Returns the best (cost, order) with
+		the order as indexes into self.modules
+		"""
+		rng = random.Random(seed)
+
+		full_placed = [ self.modules[i] for i in full_idx ]
+		order       = [ self.modules[i] for i in order_idx ]
+
+		snap = self._snapshot()
+
+		# Start from the greedy order
+		cur      = order
+		cur_cost = self._order_cost(snap, full_placed, cur)
+
+		best      = cur
+		best_cost = cur_cost
+
+		# Initial temperature allows trading a few missing-fill sites
+		t0 = self.cfg.tt.grid.x * self.cfg.tt.grid.y * (self.cfg.tt.grid.x + self.cfg.tt.grid.y)
+
+		t_start = time.monotonic()
+
+		while len(cur) > 1:
+			# Time check
+			elapsed = time.monotonic() - t_start
+			if elapsed >= budget:
+				break
+
+			temp = t0 * (1.0 - elapsed / budget)
+
+			# Random move: swap two modules or move one
+			new = list(cur)
+			i = rng.randrange(len(new))
+			j = rng.randrange(len(new))
+
+			if rng.random() < 0.5:
+				new[i], new[j] = new[j], new[i]
+			else:
+				new.insert(j, new.pop(i))
+
+			# Evaluate and accept / reject
+			new_cost = self._order_cost(snap, full_placed, new)
+
+			if (new_cost <= cur_cost) or (rng.random() < math.exp((cur_cost - new_cost) / temp)):
+				cur      = new
+				cur_cost = new_cost
+
+			if cur_cost < best_cost:
+				best      = cur
+				best_cost = cur_cost
+
+		# Leave things as we found them
+		self._restore(snap, full_placed)
+
+		idx = dict([(m, i) for i, m in enumerate(self.modules)])
+
+		return best_cost, [ idx[m] for m in best ]
+
+	def _optimize_order(self, full_placed, order):
+		"""
+		Runs several annealing restarts in parallel and returns the best
+		order found, or the original one if nothing beats it
+		"""
+		verbose, self.verbose = self.verbose, False
+		report,  self.report  = self.report,  None
+
+		# Reference greedy cost
+		snap = self._snapshot()
+		greedy_cost = self._order_cost(snap, full_placed, order)
+		self._restore(snap, full_placed)
+
+		# Run the restarts
+		idx = dict([(m, i) for i, m in enumerate(self.modules)])
+
+		full_idx  = [ idx[m] for m in full_placed ]
+		order_idx = [ idx[m] for m in order ]
+
+		if self.jobs > 1:
+			from concurrent.futures import ProcessPoolExecutor
+
+			data = pickle.dumps(self)
+			with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+				futures = [
+					pool.submit(_anneal_worker, data, full_idx, order_idx, seed, self.optimize)
+						for seed in range(self.jobs)
+				]
+				results = [ f.result() for f in futures ]
+		else:
+			results = [ self._anneal(full_idx, order_idx, 0, self.optimize) ]
+
+		# Pick the best one
+		best_cost, best_idx = min(results, key=lambda r: r[0])
+
+		self.verbose = verbose
+		self.report  = report
+
+		if best_cost < greedy_cost:
+			if self.verbose:
+				print(f"Optimized placement cost: {best_cost:d} (greedy: {greedy_cost:d})")
+			return [ self.modules[i] for i in best_idx ]
+
+		return order
+
+
+def _anneal_worker(data, full_idx, order_idx, seed, budget):
+	# Runs in a separate process with its own copy of the placer
+	placer = pickle.loads(data)
+	return placer._anneal(full_idx, order_idx, seed, budget)
+
+
+class AnchorIndex:
+	"""
+	Index of legal anchor positions for auto-placement.
+
+	Anchors are kept per footprint class (width, height, side of the
+	midline, missing fill mode) as one set of X per row. A class is built
+	from the placer occupancy the first time it's needed and then updated
+	in place whenever sites get used. Since sites are never freed, anchors
+	only ever disappear and the first candidate row for each class can
+	only move forward in the `yc` preference order.
+	"""
+
+	def __init__(self, placer):
+		self.placer = placer
+		self.rows   = {}	# (w, h, side, mf) -> [ set(x) for each y ]
+		self.heads  = {}	# (w, h, mf) -> index in placer.yc of first candidate row
+
+	def _build(self, mod, mf):
+		gx    = self.placer.cfg.tt.grid.x
+		mid_x = gx // 2
+
+		rows_l = []
+		rows_r = []
+
+		for y in range(self.placer.cfg.tt.grid.y):
+			ok = self.placer._row_suitable(mod, y)
+			rows_l.append(set([x for x in range(0, mid_x) if ok[x]]))
+			rows_r.append(set([x for x in range(mid_x, gx) if ok[x]]))
+
+		self.rows[(mod.width, mod.height, 'l', mf)] = rows_l
+		self.rows[(mod.width, mod.height, 'r', mf)] = rows_r
+		self.heads[(mod.width, mod.height, mf)] = 0
+
+	def find(self, mod):
+		# Build the class if needed
+		mf  = self.placer.missing_fill
+		key = (mod.width, mod.height, mf)
+
+		if key not in self.heads:
+			self._build(mod, mf)
+
+		rows_l = self.rows[(mod.width, mod.height, 'l', mf)]
+		rows_r = self.rows[(mod.width, mod.height, 'r', mf)]
+
+		# Skip rows that are exhausted
+		yc = self.placer.yc
+		i  = self.heads[key]
+
+		while (i < len(yc)) and not (rows_l[yc[i]] or rows_r[yc[i]]):
+			i += 1
+
+		self.heads[key] = i
+
+		if i == len(yc):
+			return None, None
+
+		# Left side X are always lower than right side ones
+		y = yc[i]
+		return min(rows_l[y] or rows_r[y]), y
+
+	def remove_sites(self, x0, x1, y0, y1):
+		# Discard all anchors whose footprint overlaps the given range
+		for (w, h, side, mf), rows in self.rows.items():
+			# Anchors grow toward the middle (left side ones cover
+			# [x, x+w-1], right side ones [x-w+1, x])
+			if side == 'l':
+				ax0, ax1 = x0 - w + 1, x1
+			else:
+				ax0, ax1 = x0, x1 + w - 1
+
+			# Anchors on even rows grow down, odd rows grow up
+			for ay in range(max(y0 - h + 1, 0), min(y1 + h - 1, len(rows))):
+				if ay & 1:
+					hit = (ay < y1) and (ay + h > y0)
+				else:
+					hit = (ay >= y0) and (ay - h < y1 - 1)
+
+				if hit:
+					rows[ay].difference_update(range(ax0, ax1))
 
 
 AnalogPin = namedtuple('AnalogPin', 'num y mods dedicated')
@@ -433,6 +1223,20 @@ class AnalogPinGroup:
 		else:
 			self.pos_y = h_mid - d
 
+		# Pin load index
+			# Non-dedicated pins are bucketed by number of users and each
+			# bucket is kept sorted by (distance to mux, pin order)
+		self.pin_key     = {}	# pin num -> (dist, order, num)
+		self.pin_buckets = {}	# load -> sorted list of pin keys
+		self.pin_loads   = []	# sorted list of non-empty loads
+		self.pin_load_total = 0	# sum of all pins loads
+
+		for i, pin in enumerate(self.pins.values()):
+			self.pin_load_total += len(pin.mods)
+			if not pin.dedicated:
+				self.pin_key[pin.num] = (abs(pin.y - self.pos_y), i, pin.num)
+				self._pin_index_add(pin)
+
 		# Generate free spots in order of preference
 		mux_ids = cfg_grp['mux_id']
 		l = len(mux_ids)
@@ -468,6 +1272,27 @@ class AnalogPinGroup:
 		# Keep a copy of all positions in this group
 		self.pos_all = set(pos_free)
 
+		# Free positions index
+			# Preference order of each position
+		self.pos_order = list(pos_free)
+		self.pos_rank  = dict([(p, i) for i, p in enumerate(pos_free)])
+
+			# Length of the free run (blk_id, blk_id - 2, ...) starting at
+			# each free position, and for each width the sorted ranks of the
+			# positions where it fits
+		self.pos_free = set(pos_free)
+		self.pos_run  = {}
+		self.pos_fit  = [ [] for w in range(n + 1) ]
+
+		for mux_id, blk_id in sorted(pos_free, key=lambda p: p[1]):
+			run = self.pos_run.get( (mux_id, blk_id - 2), 0 ) + 1
+			self.pos_run[(mux_id, blk_id)] = run
+			for w in range(1, run + 1):
+				self.pos_fit[w].append(self.pos_rank[(mux_id, blk_id)])
+
+		for l in self.pos_fit:
+			l.sort()
+
 		# Debug print
 		if False:
 			for amux_id, ablk_id, inv in pos_free:
@@ -477,61 +1302,91 @@ class AnalogPinGroup:
 				print(f'{amux_id:2d}/{ablk_id:2d} - {dmux_id:2d}/{dblk_id:2d} | {ax:2d}/{ay:2d} - {dx:2d}/{dy:2d}')
 			print("-----")
 
-	def pick_pins_in_set(self, pins, n):
-		# Sort by user * distance
-		return sorted(pins, key=lambda p: (len(p.mods) + 1) * abs(p.y - self.pos_y))[0:n]
+	def _pin_index_add(self, pin):
+		load = len(pin.mods)
+		if load not in self.pin_buckets:
+			self.pin_buckets[load] = []
+			bisect.insort(self.pin_loads, load)
+		bisect.insort(self.pin_buckets[load], self.pin_key[pin.num])
+
+	def _pin_index_remove(self, pin):
+		load = len(pin.mods)
+		bucket = self.pin_buckets[load]
+		bucket.pop(bisect.bisect_left(bucket, self.pin_key[pin.num]))
+		if not bucket:
+			del self.pin_buckets[load]
+			self.pin_loads.remove(load)
+
+	def add_pin_user(self, pin, mod):
+		# Assign module to pin and update the load index
+		if not pin.dedicated:
+			self._pin_index_remove(pin)
+
+		pin.mods.append(mod)
+		self.pin_load_total += 1
+
+		if not pin.dedicated:
+			self._pin_index_add(pin)
 
 	def pick_pins_for_module(self, m):
 		# How many pins needed ?
 		n = len([x for x in m.analog.values() if x is None])
 
-		# Build a map of # users -> pin list
-		use_map = {}
-		for pin in self.pins.values():
-			if pin.dedicated:
-				continue
-			use_map.setdefault(len(pin.mods), []).append(pin)
-
-		use_cnt = sorted(use_map.keys())
-
 		# Check the least 2 used groups see if there are enough pins
-		for i in range(min([len(use_cnt), 2])):
-			if len(use_map[use_cnt[i]]) >= n:
-				return self.pick_pins_in_set(use_map[use_cnt[i]], n)
+		# (within a group, closest first)
+		for load in self.pin_loads[0:2]:
+			bucket = self.pin_buckets[load]
+			if len(bucket) >= n:
+				return [ self.pins[k[2]] for k in bucket[0:n] ]
 
 		# Just use the N least used pins
 		pl = []
 
-		for k in use_cnt:
-			pl.extend(use_map[k])
+		for load in self.pin_loads:
+			pl.extend([ (load, k) for k in self.pin_buckets[load] ])
 			if len(pl) >= n:
 				break
 
 		if len(pl) < n:
 			return None
 
-		return self.pick_pins_in_set(pl, n)
+		# Sort by user * distance
+		pl.sort(key=lambda e: ((e[0] + 1) * e[1][0], e[0], e[1][1]))
+
+		return [ self.pins[k[2]] for load, k in pl[0:n] ]
 
 	def pick_pos_for_module(self, mod):
 		# Is there even space ?
-		if mod.width > len(self.pos_free):
+		if (mod.width >= len(self.pos_fit)) or not self.pos_fit[mod.width]:
 			return None
 
-		# Scan for a match
-		for mux_id, blk_id in self.pos_free:
-			# Check if it fits
-			fit = True
-			for i in range(mod.width):
-				if (mux_id, blk_id - 2*i) not in self.pos_free:
-					fit = False
-					break
+		# Most preferred position where it fits
+		return self.pos_order[self.pos_fit[mod.width][0]]
 
-			# Yes ?
-			if fit:
-				return mux_id, blk_id
+	def _pos_remove(self, mux_id, blk_id):
+		# Remove from free set
+		if (mux_id, blk_id) not in self.pos_free:
+			raise RuntimeError(f'Analog position {mux_id:d}/{blk_id:d} used twice')
 
-		# No match found
-		return None
+		self.pos_free.remove( (mux_id, blk_id) )
+
+		# Update runs of this position and all the ones above it
+		run = 0
+		while (mux_id, blk_id) in self.pos_run:
+			old_run = self.pos_run[(mux_id, blk_id)]
+			rank    = self.pos_rank[(mux_id, blk_id)]
+
+			for w in range(run + 1, old_run + 1):
+				l = self.pos_fit[w]
+				l.pop(bisect.bisect_left(l, rank))
+
+			if run:
+				self.pos_run[(mux_id, blk_id)] = run
+			else:
+				del self.pos_run[(mux_id, blk_id)]
+
+			blk_id += 2
+			run    += 1
 
 	def cost(self, mod, pins):
 		# If it doesn't fit, give up
@@ -545,7 +1400,7 @@ class AnalogPinGroup:
 		#  Higher cost if less free slots
 		#  Higher cost if more analog pins used
 		#  Higher cost depending on min-max pin loading difference
-		return sum([len(pin.mods) for pin in self.pins.values()])
+		return self.pin_load_total
 
 	def place(self, mod, pins):
 		# Actually assign the pins to the module
@@ -553,7 +1408,7 @@ class AnalogPinGroup:
 			if v is not None:
 				continue
 			pin = pins.pop()
-			pin.mods.append(mod)
+			self.add_pin_user(pin, mod)
 			mod.analog[k] = pin.num
 
 		# Does the module already have a position ?
@@ -573,7 +1428,13 @@ class AnalogPinGroup:
 
 		# Remove from free list
 		for i in range(mod.width):
-			self.pos_free.remove( (mux_id, blk_id - 2*i) )
+			self._pos_remove(mux_id, blk_id - 2*i)
+
+	def pos_state_save(self):
+		return set(self.pos_free), dict(self.pos_run), [ list(l) for l in self.pos_fit ]
+
+	def pos_state_restore(self, state):
+		self.pos_free, self.pos_run, self.pos_fit = state
 
 	def is_pos_in_group(self, mux_id, blk_id):
 		return (mux_id, blk_id) in self.pos_all
@@ -581,14 +1442,90 @@ class AnalogPinGroup:
 	def mark_used(self, mux_id, blk_id, width=1):
 		# Remove from free list
 		for i in range(width):
-			self.pos_free.remove( (mux_id, blk_id - 2*i) )
+			self._pos_remove(mux_id, blk_id - 2*i)
+
+
+class MinCostFlow:
+	"""
+	Minimal min-cost flow solver (successive shortest paths with SPFA),
+	good enough for the small graphs of analog pin assignment
+	"""
+
+	def __init__(self, n):
+		self.n     = n
+		self.edges = []		# [ to, capacity, cost ], reverse edge is at index ^ 1
+		self.graph = [ [] for i in range(n) ]
+
+	def add_edge(self, u, v, cap, cost):
+		e = len(self.edges)
+		self.graph[u].append(e)
+		self.edges.append([v, cap, cost])
+		self.graph[v].append(e + 1)
+		self.edges.append([u, 0, -cost])
+		return e
+
+	def edge_flow(self, e):
+		return self.edges[e ^ 1][1]
+
+	def solve(self, s, t, need):
+		total = 0
+		cost  = 0
+
+		while total < need:
+			# Shortest path in residual graph
+			dist = [ None ] * self.n
+			prev = [ None ] * self.n
+			inq  = [ False ] * self.n
+
+			dist[s] = 0
+			queue = [ s ]
+
+			while queue:
+				u = queue.pop(0)
+				inq[u] = False
+				for e in self.graph[u]:
+					v, cap, c = self.edges[e]
+					if cap <= 0:
+						continue
+					if (dist[v] is None) or (dist[u] + c < dist[v]):
+						dist[v] = dist[u] + c
+						prev[v] = e
+						if not inq[v]:
+							inq[v] = True
+							queue.append(v)
+
+			if dist[t] is None:
+				break
+
+			# Bottleneck
+			f = need - total
+			v = t
+			while v != s:
+				e = prev[v]
+				f = min(f, self.edges[e][1])
+				v = self.edges[e ^ 1][0]
+
+			# Augment
+			v = t
+			while v != s:
+				e = prev[v]
+				self.edges[e][1]     -= f
+				self.edges[e ^ 1][1] += f
+				v = self.edges[e ^ 1][0]
+
+			total += f
+			cost  += f * dist[t]
+
+		return total, cost
 
 
 class AnalogPlacer:
 
-	def __init__(self, placer):
+	def __init__(self, placer, balance=False):
 		# Save placer
 		self.placer = placer
+		self.balance = balance
+		self.report = placer.report
 
 		# Create the pin groups
 		self.groups = [AnalogPinGroup(placer, g) for g in placer.cfg.tt.analog]
@@ -666,15 +1603,21 @@ class AnalogPlacer:
 							raise RuntimeError(f'Module {m.name} has assigned analog pins in several groups or in a group different than its forced position')
 
 						# Mark pin as used in the group
-						grp.pins[v].mods.append(m)
+						grp.add_pin_user(grp.pins[v], m)
 
 				# If we have a group, keep it
 				mods_fixed[m] = grp
 
+		# Global assignment ?
+		if self.balance:
+			self._place_balanced(analog_mods, mods_fixed)
+			return
+
 		# Scan those a second time to assign pins in the same group
 		for m, grp in mods_fixed.items():
 			pins = grp.pick_pins_for_module(m)
 			grp.place(m, pins)
+			self._report_placed(m, grp, 'fixed')
 
 		# Finally place the rest
 		for m in analog_mods:
@@ -684,22 +1627,239 @@ class AnalogPlacer:
 
 			# Pick pins and Evaluate cost for each group and pick best
 			l = []
+			c = []
 
 			for grp in self.groups:
 				pins = grp.pick_pins_for_module(m)
 				if pins is None:
+					c.append('no_pins')
 					continue
 
 				cost = grp.cost(m, pins)
 				if cost is None:
+					c.append('no_slot')
 					continue
 
+				c.append(cost)
 				l.append( (grp, pins, cost) )
 
+			if self.report is not None:
+				self.report.module(m, 'analog')['groups'] = c
+
 			if len(l) == 0:
+				if self.report is not None:
+					self.report.failed.append(m.name)
 				raise RuntimeError(f"Analog module {m.name} couldn't be placed")
 
 			grp, pins, cost = sorted(l, key=lambda gp: gp[2])[0]
 
 			# Place module in it
 			grp.place(m, pins)
+			self._report_placed(m, grp, 'greedy')
+
+	def _report_placed(self, m, grp, pass_name):
+		if self.report is None:
+			return
+
+		rec = self.report.module(m, 'analog')
+		rec['attempts'].append({
+			'pass':   pass_name,
+			'group':  self.groups.index(grp),
+			'pins':   sorted(m.analog.values()),
+			'result': [ m.pos_x, m.pos_y ],
+		})
+
+	def _group_order(self, grp, members):
+		# Order in which modules get their slots in a group: the ones with
+		# a fixed position first, then biggest first
+		fixed = [ m for m in members if m.pos_x is not None ]
+		other = [ m for m in members if m.pos_x is None ]
+		return fixed + sorted(other, key=lambda m: m.width, reverse=True)
+
+	def _group_pins(self, grp, members):
+		"""
+		Assigns pins to all members of a group at once using a min-cost
+		flow where the k-th user of a pin costs more than the (k-1)-th one
+		(so sum of squared loads is minimized), with distance to the mux as
+		tie-breaker. Returns ({module: [pins]}, number of unassigned pins)
+		"""
+		pins = [ p for p in grp.pins.values() if not p.dedicated ]
+		need = [ len([v for v in m.analog.values() if v is None]) for m in members ]
+
+		# Nodes: source, modules, pins, sink
+		M = len(members)
+		P = len(pins)
+		S = 0
+		T = M + P + 1
+
+		BIG = 1 << 40
+
+		mcf = MinCostFlow(M + P + 2)
+		edges = {}
+
+		for i, m in enumerate(members):
+			mcf.add_edge(S, 1 + i, need[i], 0)
+			for j, p in enumerate(pins):
+				edges[(i, j)] = mcf.add_edge(1 + i, 1 + M + j, 1, abs(p.y - grp.pos_y))
+
+		for j, p in enumerate(pins):
+			base = len(p.mods)
+			for k in range(1, M + 1):
+				mcf.add_edge(1 + M + j, T, 1, (2 * (base + k) - 1) * BIG)
+
+		total, cost = mcf.solve(S, T, sum(need))
+
+		# Collect result
+		rv = dict([ (m, []) for m in members ])
+
+		for (i, j), e in edges.items():
+			if mcf.edge_flow(e):
+				rv[members[i]].append(pins[j])
+
+		return rv, sum(need) - total
+
+	def _group_eval(self, grp, members):
+		"""
+		Evaluates a group with the given member modules. Returns a tuple
+		(unplaced modules, pin assignment, cost terms)
+		"""
+		unplaced = []
+
+		# Simulate slot allocation
+		state = grp.pos_state_save()
+
+		for m in self._group_order(grp, members):
+			if m.pos_x is not None:
+				mux_id, blk_id = self.placer.la2ld(*self.placer.p2l(m.pos_x, m.pos_y))
+			else:
+				pos = grp.pick_pos_for_module(m)
+				if pos is None:
+					unplaced.append(m)
+					continue
+				mux_id, blk_id = pos
+
+			for i in range(m.width):
+				grp._pos_remove(mux_id, blk_id - 2*i)
+
+		slots_used = len(grp.pos_all) - len(grp.pos_free)
+
+		grp.pos_state_restore(state)
+
+		# Pins
+		pin_map, pins_missing = self._group_pins(grp, members)
+
+		loads = dict([ (p.num, len(p.mods)) for p in grp.pins.values() if not p.dedicated ])
+		dist  = 0
+		for m, pl in pin_map.items():
+			for p in pl:
+				loads[p.num] += 1
+				dist += abs(p.y - grp.pos_y)
+
+		if pins_missing:
+			unplaced.extend([ m for m, pl in pin_map.items() if len(pl) < len([v for v in m.analog.values() if v is None]) ])
+
+		lv = list(loads.values()) or [0]
+
+		return unplaced, pin_map, (
+			max(lv),						# Worst pad loading
+			max(lv) - min(lv),				# Loading spread
+			sum([l * l for l in lv]),		# Overall balance
+			slots_used * slots_used,		# Slot usage balance
+			dist,							# Distance to pads
+		)
+
+	def _place_balanced(self, analog_mods, mods_fixed):
+		"""
+		Global assignment of analog modules to groups, slots and pins.
+
+		Pins are assigned per group with a min-cost flow and the group of
+		each module is chosen by local search (moving a module or swapping
+		two) to minimize, in order: unplaced modules, worst pad loading,
+		loading spread, sum of squared loads, slot usage and distance.
+		"""
+		groups    = self.groups
+		free_mods = [ m for m in analog_mods if mods_fixed.get(m) is None ]
+
+		# Initial assignment, each module to the group with most slots left
+		assign = dict([ (m, g) for m, g in mods_fixed.items() if g is not None ])
+
+		left = dict([ (g, len(g.pos_free) - sum([m.width for m, mg in assign.items() if mg is g])) for g in groups ])
+
+		for m in free_mods:
+			g = max(groups, key=lambda g: left[g])
+			assign[m] = g
+			left[g] -= m.width
+
+		# Evaluation with cache (moves only touch 2 groups)
+		cache = {}
+
+		def group_eval(g, members):
+			key = (g, frozenset(members))
+			if key not in cache:
+				cache[key] = self._group_eval(g, members)
+			return cache[key]
+
+		def evaluate(assign):
+			res = [ group_eval(g, [ m for m in analog_mods if assign.get(m) is g ]) for g in groups ]
+			unplaced = sum([ len(r[0]) for r in res ])
+			terms = [ r[2] for r in res ]
+			return (
+				unplaced,
+				max([ t[0] for t in terms ]),
+				sum([ t[1] for t in terms ]),
+				sum([ t[2] for t in terms ]),
+				sum([ t[3] for t in terms ]),
+				sum([ t[4] for t in terms ]),
+			)
+
+		cost = evaluate(assign)
+
+		# Local search
+		rounds   = 0
+		improved = True
+		while improved:
+			rounds  += 1
+			improved = False
+
+			# Move one module
+			for m in free_mods:
+				for g in groups:
+					if assign[m] is g:
+						continue
+					new = dict(assign)
+					new[m] = g
+					new_cost = evaluate(new)
+					if new_cost < cost:
+						assign, cost, improved = new, new_cost, True
+
+			# Swap two modules
+			for i, a in enumerate(free_mods):
+				for b in free_mods[i+1:]:
+					if assign[a] is assign[b]:
+						continue
+					new = dict(assign)
+					new[a], new[b] = assign[b], assign[a]
+					new_cost = evaluate(new)
+					if new_cost < cost:
+						assign, cost, improved = new, new_cost, True
+
+		if self.report is not None:
+			self.report.analog = {
+				'rounds':      rounds,
+				'evaluations': len(cache),
+				'cost':        list(cost),
+			}
+
+		# Final placement
+		for g in groups:
+			members = [ m for m in analog_mods if assign.get(m) is g ]
+			unplaced, pin_map, terms = group_eval(g, members)
+
+			if unplaced:
+				if self.report is not None:
+					self.report.failed.extend([ m.name for m in unplaced ])
+				raise RuntimeError(f"Analog module {unplaced[0].name} couldn't be placed")
+
+			for m in self._group_order(g, members):
+				g.place(m, list(pin_map[m]))
+				self._report_placed(m, g, 'balanced')
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+#
+# Tiny Tapeout
+#
+# Placement transforms
+#
+# Copyright (c) 2026 agent <agent@local>
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from collections import namedtuple
+
+from .utils import *
+
+
+__all__ = [ 'Transform' ]
+
+
+class Transform(namedtuple('Transform', 'a b c d tx ty')):
+	"""
+	Integer affine transform restricted to the 8 DEF orientations:
+
+	  x' = a * x + b * y + tx
+	  y' = c * x + d * y + ty
+
+	`a @ b` is the composition (apply `b` first, then `a`). Points and
+	rects can be transformed, one at a time or as lists of them, rects
+	are kept normalized (x0 <= x1, y0 <= y1).
+	"""
+
+	__slots__ = ()
+
+	# Linear part of each orientation (a, b, c, d)
+	ORIENTS = {
+		'N':  ( 1,  0,  0,  1),	# R0
+		'W':  ( 0, -1,  1,  0),	# R90
+		'S':  (-1,  0,  0, -1),	# R180
+		'E':  ( 0,  1, -1,  0),	# R270
+		'FN': (-1,  0,  0,  1),	# MY
+		'FW': ( 0,  1,  1,  0),	# MXR90
+		'FS': ( 1,  0,  0, -1),	# MX
+		'FE': ( 0, -1, -1,  0),	# MYR90
+	}
+
+	ORIENT_OF = dict([ (m, o) for o, m in ORIENTS.items() ])
+
+	@classmethod
+	def identity(kls):
+		return kls(1, 0, 0, 1, 0, 0)
+
+	@classmethod
+	def from_orient(kls, orient):
+		try:
+			return kls(*kls.ORIENTS[orient], 0, 0)
+		except KeyError:
+			raise RuntimeError(f'Unsupported orientation {orient}')
+
+	@classmethod
+	def place(kls, pos, orient, width, height):
+		"""
+		Transform from the local coordinates of an element of the given
+		size to its parent, when placed DEF-style: oriented, then with the
+		lower left corner of its bounding box at `pos`
+		"""
+		t  = kls.from_orient(orient)
+		ll = t.apply_rect(Rect(0, 0, width, height))
+		return t._replace(tx = pos[0] - ll.x0, ty = pos[1] - ll.y0)
+
+	@property
+	def orient(self):
+		return self.ORIENT_OF[self[0:4]]
+
+	def __matmul__(self, other):
+		a, b, c, d, tx, ty = self
+		return Transform(
+			a * other.a + b * other.c,
+			a * other.b + b * other.d,
+			c * other.a + d * other.c,
+			c * other.b + d * other.d,
+			a * other.tx + b * other.ty + tx,
+			c * other.tx + d * other.ty + ty,
+		)
+
+	def apply(self, p):
+		return Point(
+			self.a * p[0] + self.b * p[1] + self.tx,
+			self.c * p[0] + self.d * p[1] + self.ty,
+		)
+
+	def apply_rect(self, r):
+		p0 = self.apply( (r.x0, r.y0) )
+		p1 = self.apply( (r.x1, r.y1) )
+
+		# Orientations map axes to axes, the sign tells if the order swaps
+		sx = (self.a + self.b) > 0
+		sy = (self.c + self.d) > 0
+
+		return Rect(
+			p0.x if sx else p1.x,
+			p0.y if sy else p1.y,
+			p1.x if sx else p0.x,
+			p1.y if sy else p0.y,
+		)
+
+	# Batched versions (lists of points / rects, as tuples or Point / Rect)
+	def apply_points(self, points):
+		a, b, c, d, tx, ty = self
+		return [ Point(a * x + b * y + tx, c * x + d * y + ty) for x, y in points ]
+
+	def apply_rects(self, rects):
+		a, b, c, d, tx, ty = self
+
+		sx = (a + b) > 0
+		sy = (c + d) > 0
+
+		rv = []
+		for x0, y0, x1, y1 in rects:
+			ax, ay = a * x0 + b * y0 + tx, c * x0 + d * y0 + ty
+			bx, by = a * x1 + b * y1 + tx, c * x1 + d * y1 + ty
+			rv.append(Rect(
+				ax if sx else bx,
+				ay if sy else by,
+				bx if sx else ax,
+				by if sy else ay,
+			))
+		return rv
@@ -9,12 +9,97 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 
-import yaml
+import hashlib
+import operator
+import os
+import sys
 
 from collections import namedtuple
 
+# Note: yaml / pickle / tempfile are imported on first use so that tools
+# only needing e.g. LayoutDimension don't pay for them
 
-__all__ = [ 'ConfigNode', 'LayoutNode', 'Point', 'Rect', 'LayoutDimension' ]
+
+__all__ = [ 'ConfigNode', 'FrozenConfigNode', 'LayoutNode', 'Point', 'Rect', 'LayoutDimension', 'LayoutContext', 'LayoutDimensionArray', 'DiskCache' ]
+
+
+def yaml_loader():
+	# Use the libyaml loader when available, it's a lot faster
+	import yaml
+	return yaml, getattr(yaml, 'CFullLoader', yaml.FullLoader)
+
+
+class DiskCache:
+	"""
+	Small on-disk cache of pickled objects.
+
+	Caching is opt-in: entries are only stored in / loaded from `$TT_CACHE_DIR`
+	when it's set (to a non-empty path). Keys include the Python version and
+	the state of the `tt` package sources so that a code change never loads
+	stale pickles. Any error reading or writing is just treated as a cache
+	miss.
+	"""
+
+	VERSION = 1
+
+	_code_version = None
+
+	def __init__(self, kind):
+		self.kind = kind
+		self.path = self.get_dir()
+
+	@staticmethod
+	def get_dir():
+		return os.getenv('TT_CACHE_DIR') or None
+
+	@classmethod
+	def code_version(kls):
+		"""Identifies the package sources (name, size and mtime of each file)"""
+		if kls._code_version is None:
+			h = hashlib.sha256(sys.version.encode())
+			pkg_dir = os.path.dirname(os.path.abspath(__file__))
+			for e in sorted(os.scandir(pkg_dir), key=lambda e: e.name):
+				if e.name.endswith('.py'):
+					st = e.stat()
+					h.update(f'\0{e.name:s}:{st.st_size:d}:{st.st_mtime_ns:d}'.encode())
+			kls._code_version = h.hexdigest()
+		return kls._code_version
+
+	@classmethod
+	def key(kls, *parts):
+		h = hashlib.sha256(f'{kls.VERSION:d}'.encode())
+		h.update(kls.code_version().encode())
+		for p in parts:
+			h.update(b'\0')
+			h.update(p if isinstance(p, bytes) else str(p).encode())
+		return h.hexdigest()
+
+	def _fn(self, key):
+		return os.path.join(self.path, f'{self.kind:s}-{key:s}.pkl')
+
+	def load(self, key):
+		if self.path is None:
+			return None
+		import pickle
+		try:
+			with open(self._fn(key), 'rb') as fh:
+				return pickle.load(fh)
+		except Exception:
+			return None
+
+	def store(self, key, obj):
+		if self.path is None:
+			return
+		import pickle, tempfile
+		try:
+			os.makedirs(self.path, exist_ok=True)
+			# Write to temp file and rename to be safe with concurrent steps
+			fd, tmp_fn = tempfile.mkstemp(dir=self.path, prefix=f'.{self.kind:s}-')
+			with os.fdopen(fd, 'wb') as fh:
+				pickle.dump(obj, fh)
+			os.replace(tmp_fn, self._fn(key))
+		except Exception:
+			pass
 
 
 class ConfigNode:
@@ -27,6 +112,10 @@ class ConfigNode:
 				self[k] = v
 
 	def __getattr__(self, k):
+		# Private names are never config entries (this also keeps pickle
+		# happy since `_cfg` doesn't exist yet when unpickling)
+		if k[0] == '_':
+			raise AttributeError(k)
 		try:
 			return self._cfg[k]
 		except KeyError:
@@ -68,19 +157,154 @@ class ConfigNode:
 					self._cfg[k] = nv
 
 	def update_from_yaml(self, stream):
-		self.update_from_dict(yaml.load(stream, yaml.FullLoader))
+		yaml, loader = yaml_loader()
+		self.update_from_dict(yaml.load(stream, loader))
+
+	def freeze(self):
+		"""Returns an immutable snapshot of this config (see FrozenConfigNode)"""
+		return _freeze(self)
+
+	def content_hash(self):
+		return self.freeze().content_hash()
+
+
+class FrozenConfigNode(tuple):
+	"""
+	Immutable, slotted view of a ConfigNode.
+
+	Each node is an instance of a namedtuple-like class generated for its
+	set of keys, so attribute access is a plain slot lookup. Nodes are
+	hashable and compare by content and `content_hash()` gives a hash that's
+	stable across runs (currently only used as the config key of Layout
+	artifacts). Dicts become FrozenDict and lists become tuples.
+
+	Like for ConfigNode, a key named like a method (`keys`, `get`, `count`,
+	...) doesn't shadow it and is only reachable as `node['keys']`.
+	"""
+
+	__slots__ = ()
+
+	_fields = ()
+	_index  = {}
+
+	def __getitem__(self, k):
+		if isinstance(k, str):
+			try:
+				k = self._index[k]
+			except KeyError:
+				raise KeyError(k) from None
+		return tuple.__getitem__(self, k)
+
+	def __contains__(self, k):
+		return k in self._fields
+
+	def __eq__(self, other):
+		return (type(self) is type(other)) and tuple.__eq__(self, other)
+
+	def __ne__(self, other):
+		return not self.__eq__(other)
+
+	def __hash__(self):
+		return hash( (self._fields, tuple(self)) )
+
+	def __reduce__(self):
+		return (_frozen_node, (self._fields, tuple(self)))
+
+	def __repr__(self):
+		return 'FrozenConfigNode(' + ', '.join([f'{k}={v!r}' for k, v in self.items()]) + ')'
+
+	def keys(self):
+		return self._fields
+
+	def items(self):
+		return zip(self._fields, self)
+
+	def get(self, k, default=None):
+		i = self._index.get(k)
+		return default if i is None else tuple.__getitem__(self, i)
+
+	def content_hash(self):
+		import hashlib, json
+
+		def _plain(v):
+			if isinstance(v, FrozenConfigNode):
+				return dict([ (k, _plain(sv)) for k, sv in v.items() ])
+			elif isinstance(v, dict):
+				return dict([ (str(k), _plain(sv)) for k, sv in v.items() ])
+			elif isinstance(v, (list, tuple)):
+				return [ _plain(sv) for sv in v ]
+			elif isinstance(v, int) and not isinstance(v, bool):
+				return int(v)
+			return v
+
+		data = json.dumps(_plain(self), sort_keys=True, separators=(',', ':'))
+		return hashlib.sha256(data.encode()).hexdigest()
+
+
+class FrozenDict(dict):
+	"""Immutable & hashable dict used for plain dicts inside frozen configs"""
+
+	def _readonly(self, *args, **kwargs):
+		raise TypeError('FrozenDict is immutable')
+
+	__setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+
+	def __hash__(self):
+		return hash(frozenset(self.items()))
+
+	def __reduce__(self):
+		return (FrozenDict, (dict(self),))
+
+
+_frozen_classes = {}
+
+def _frozen_class(fields):
+	kls = _frozen_classes.get(fields)
+	if kls is None:
+		ns = {
+			'__slots__': (),
+			'_fields':   fields,
+			'_index':    dict([ (f, i) for i, f in enumerate(fields) ]),
+		}
+		for i, f in enumerate(fields):
+			# Methods (and private names) win over keys for attribute access
+			if not hasattr(FrozenConfigNode, f):
+				ns[f] = property(operator.itemgetter(i))
+		kls = _frozen_classes[fields] = type('FrozenConfigNode', (FrozenConfigNode,), ns)
+	return kls
+
+def _frozen_node(fields, values):
+	return tuple.__new__(_frozen_class(fields), values)
+
+def _freeze(v):
+	if isinstance(v, (ConfigNode, FrozenConfigNode)):
+		fields = tuple([ k for k, sv in v.items() ])
+		return _frozen_node(fields, [ _freeze(sv) for k, sv in v.items() ])
+	elif isinstance(v, dict):
+		return FrozenDict([ (k, _freeze(sv)) for k, sv in v.items() ])
+	elif isinstance(v, (list, tuple)):
+		return tuple([ _freeze(sv) for sv in v ])
+	return v
 
 
 class LayoutNode:
+	"""
+	Tree of LayoutDimension. All the values of a node (and its sub-nodes)
+	belong to its LayoutContext (`ctx`, default one if not given) and plain
+	`int` are converted to it.
+	"""
 
-	def __init__(self, init=None):
+	def __init__(self, init=None, ctx=None):
 		self._dat = {}
+		self._ctx = ctx or LayoutDimension.ctx
 
 		if init is not None:
 			for k,v in init.items():
 				self[k] = v
 
 	def __getattr__(self, k):
+		if k[0] == '_':
+			raise AttributeError(k)
 		try:
 			return self._dat[k]
 		except KeyError:
@@ -91,15 +315,22 @@ class LayoutNode:
 			# Process value
 			if isinstance(v, dict):
 				# Dict become LayoutNodes
-				v = self.__class__(v)
+				v = self.__class__(v, self._ctx)
+
+			elif isinstance(v, LayoutDimension):
+				# Default context ones are moved to ours
+				if v.ctx is not self._ctx:
+					if v.__class__ is not LayoutDimension:
+						raise ValueError('LayoutDimension from a different LayoutContext')
+					v = self._ctx.Dimension(v)
 
 			elif isinstance(v, int):
 				# Integer become LayoutDimension
-				v = LayoutDimension(v)
+				v = self._ctx.Dimension(v)
 
 			elif isinstance(v, self.__class__):
-				# Nothing to do
-				pass
+				if v._ctx is not self._ctx:
+					raise ValueError('LayoutNode from a different LayoutContext')
 
 			else:
 				# Unsupported
@@ -164,43 +395,64 @@ class Rect(namedtuple('Rect', 'x0 y0 x1 y1')):
 
 
 class LayoutDimension(int):
+	"""
+	Layout dimension in nm.
 
-	__iu_scale = 1000
+	Each dimension references the LayoutContext it belongs to (through its
+	class) which gives the scale to convert to/from internal DB units. Plain
+	LayoutDimension use the default context. Results of arithmetic keep the
+	context of the operands.
+	"""
 
-	@classmethod
-	def set_iu_scale(self, scale):
-		LayoutDimension.__iu_scale = scale
+	ctx = None	# Default LayoutContext, set below
 
 	@classmethod
 	def from_iu(kls, iu):
-		return kls(1000 * iu // kls.__iu_scale)
+		return kls(1000 * iu // kls.ctx.scale)
 
 	def __new__(kls, value, *args, **kwargs):
-		return  super(kls, kls).__new__(kls, value)
+		return int.__new__(kls, value)
+
+	def __reduce__(self):
+		return (_layout_dimension, (int(self), self.ctx.scale))
+
+	def _cls(self, other):
+		# Keep the context of whichever operand isn't in the default one
+		if isinstance(other, LayoutDimension):
+			return self._check_ctx(other.__class__)
+		return self.__class__
+
+	def _check_ctx(self, kls):
+		if (kls is LayoutDimension) or (kls is self.__class__):
+			return self.__class__
+		if self.__class__ is LayoutDimension:
+			return kls
+		raise ValueError("Can't mix LayoutDimension from different LayoutContext")
 
 	def __add__(self, other):
-		return self.__class__(int(self) + int(other))
+		return self._cls(other)(int(self) + int(other))
 
 	__radd__ = __add__
 
 	def __sub__(self, other):
-		return self.__class__(int(self) - int(other))
+		return self._cls(other)(int(self) - int(other))
 
 	def __rsub__(self, other):
-		return self.__class__(int(other) - int(self))
+		return self._cls(other)(int(other) - int(self))
 
 	def __mul__(self, other):
-		if isinstance(other, self.__class__):
+		if isinstance(other, LayoutDimension):
 			raise ValueError("Can't multiply two LayoutDimension")
 		return self.__class__(int(self) * int(other))
 
 	def __rmul__(self, other):
-		if isinstance(other, self.__class__):
+		if isinstance(other, LayoutDimension):
 			raise ValueError("Can't multiply two LayoutDimension")
 		return self.__class__(int(self) * int(other))
 
 	def __floordiv__(self, other):
-		if isinstance(other, self.__class__):
+		if isinstance(other, LayoutDimension):
+			self._cls(other)
 			return int(self) // int(other)
 		else:
 			return self.__class__(int(self) // int(other))
@@ -221,5 +473,227 @@ class LayoutDimension(int):
 
 	@property
 	def iu(self):
-		return int(round(int(self) / 1000.0 * self.__iu_scale))
+		return self.ctx.to_iu(self)
+
+
+class LayoutContext:
+	"""
+	Unit context shared by the dimensions of a layout, it holds the scale
+	(internal DB units per um) of the PDK.
+
+	Contexts are interned per scale and each one has its own LayoutDimension
+	subclass (`Dimension`) to create dimensions referencing it. Because of
+	this several configs (with different scales) can be used in the same
+	process or from several threads at once.
+	"""
+
+	DEFAULT_SCALE = 1000
+
+	_all = {}
+
+	def __new__(kls, scale=DEFAULT_SCALE):
+		ctx = kls._all.get(scale)
+		if ctx is not None:
+			return ctx
+
+		ctx = super().__new__(kls)
+		ctx.scale = scale
+
+		if scale == kls.DEFAULT_SCALE:
+			ctx.Dimension = LayoutDimension
+		else:
+			ctx.Dimension = type('LayoutDimension', (LayoutDimension,), { 'ctx': ctx })
+
+		return kls._all.setdefault(scale, ctx)
+
+	def __reduce__(self):
+		return (LayoutContext, (self.scale,))
+
+	def __repr__(self):
+		return "LayoutContext(scale=%d)" % self.scale
+
+	def to_iu(self, v):
+		return int(round(int(v) / 1000.0 * self.scale))
+
+	def from_iu(self, iu):
+		return self.Dimension(1000 * int(iu) // self.scale)
+
+
+def _layout_dimension(value, scale):
+	return LayoutContext(scale).Dimension(value)
+
+
+LayoutDimension.ctx = LayoutContext()
+
+
+class LayoutDimensionArray:
+	"""
+	Sequence of dimensions (in nm) stored as plain ints so that bulk
+	coordinate math is done in one pass without creating a LayoutDimension
+	for each intermediate result.
+
+	Same rules as LayoutDimension apply: can't multiply two dimensions,
+	dividing (or modulo) by a dimension gives plain ints and mixing two
+	different LayoutContext is an error. Operands can be a scalar (applied
+	to all elements) or an array of the same length, but the array must be
+	the left operand when the other one is a LayoutDimension. Elements are
+	returned as LayoutDimension (of the same LayoutContext as the operands).
+	"""
+
+	__slots__ = [ '_v', '_dim' ]
+
+	def __init__(self, values=(), ctx=None):
+		if not isinstance(values, (list, tuple)):
+			values = list(values)
+
+		self._v = list(map(int, values))
+
+		if ctx is not None:
+			self._dim = ctx.Dimension
+		elif values and isinstance(values[0], LayoutDimension):
+			self._dim = values[0].__class__
+		else:
+			self._dim = LayoutDimension
+
+	@classmethod
+	def _wrap(kls, values, dim=LayoutDimension):
+		rv = kls.__new__(kls)
+		rv._v   = values
+		rv._dim = dim
+		return rv
+
+	@classmethod
+	def from_iu(kls, iu_list, ctx=None):
+		ctx = ctx or LayoutDimension.ctx
+		return kls._wrap([ 1000 * int(v) // ctx.scale for v in iu_list ], ctx.Dimension)
+
+	@classmethod
+	def arange(kls, start, stop, step):
+		dim = start.__class__ if isinstance(start, LayoutDimension) else LayoutDimension
+		return kls._wrap(list(range(int(start), int(stop), int(step))), dim)
+
+	@classmethod
+	def concat(kls, *arrays):
+		dim = LayoutDimension
+		for a in arrays:
+			dim = kls._resolve(dim, a)
+		return kls._wrap([ v for a in arrays for v in a._v ], dim)
+
+	@staticmethod
+	def _resolve(dim, other):
+		# Keep the context of whichever operand isn't in the default one
+		if isinstance(other, LayoutDimension):
+			odim = other.__class__
+		elif isinstance(other, LayoutDimensionArray):
+			odim = other._dim
+		else:
+			return dim
+
+		if (odim is LayoutDimension) or (odim is dim):
+			return dim
+		if dim is LayoutDimension:
+			return odim
+		raise ValueError("Can't mix LayoutDimension from different LayoutContext")
+
+	def _dim_of(self, other):
+		return self._resolve(self._dim, other)
+
+	def _map2(self, other, fn):
+		if isinstance(other, LayoutDimensionArray):
+			if len(other._v) != len(self._v):
+				raise ValueError("LayoutDimensionArray length mismatch")
+			return [ fn(a, b) for a, b in zip(self._v, other._v) ]
+		o = int(other)
+		return [ fn(a, o) for a in self._v ]
+
+	def __add__(self, other):
+		return self._wrap(self._map2(other, operator.add), self._dim_of(other))
 
+	__radd__ = __add__
+
+	def __sub__(self, other):
+		return self._wrap(self._map2(other, operator.sub), self._dim_of(other))
+
+	def __rsub__(self, other):
+		return self._wrap(self._map2(other, lambda a, b: b - a), self._dim_of(other))
+
+	def __neg__(self):
+		return self._wrap([ -a for a in self._v ], self._dim)
+
+	def __mul__(self, other):
+		if isinstance(other, (LayoutDimension, LayoutDimensionArray)):
+			raise ValueError("Can't multiply two LayoutDimension")
+		return self._wrap(self._map2(other, operator.mul), self._dim)
+
+	__rmul__ = __mul__
+
+	def __floordiv__(self, other):
+		dim = self._dim_of(other)
+		rv  = self._map2(other, operator.floordiv)
+		if isinstance(other, (LayoutDimension, LayoutDimensionArray)):
+			return rv
+		return self._wrap(rv, dim)
+
+	def __mod__(self, other):
+		dim = self._dim_of(other)
+		rv  = self._map2(other, operator.mod)
+		if isinstance(other, (LayoutDimension, LayoutDimensionArray)):
+			return rv
+		return self._wrap(rv, dim)
+
+	def map(self, fn, *operands):
+		"""
+		Applies `fn` to each raw value (int, in nm) and returns the results
+		as a new array, in the context of this array and of `operands`
+		(the dimensions `fn` uses)
+		"""
+		dim = self._dim
+		for o in operands:
+			dim = self._resolve(dim, o)
+		return self._wrap(list(map(fn, self._v)), dim)
+
+	def __len__(self):
+		return len(self._v)
+
+	def __iter__(self):
+		return map(self._dim, self._v)
+
+	def __getitem__(self, k):
+		if isinstance(k, slice):
+			return self._wrap(self._v[k], self._dim)
+		return self._dim(self._v[k])
+
+	def __eq__(self, other):
+		if isinstance(other, LayoutDimensionArray):
+			return self._v == other._v
+		return self._v == [ int(v) for v in other ]
+
+	__hash__ = None
+
+	def __repr__(self):
+		return "LayoutDimensionArray(%r nm)" % (self._v,)
+
+	def min(self):
+		return self._dim(min(self._v))
+
+	def max(self):
+		return self._dim(max(self._v))
+
+	def tolist(self):
+		return list(self)
+
+	@property
+	def ctx(self):
+		return self._dim.ctx
+
+	@property
+	def nm(self):
+		return list(self._v)
+
+	@property
+	def um(self):
+		return [ a / 1000.0 for a in self._v ]
+
+	@property
+	def iu(self):
+		return list(map(self._dim.ctx.to_iu, self._v))
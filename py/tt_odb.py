@@ -7,9 +7,10 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 
-import tt
 import odb
 
+from tt.pins import PIN_WIDTH, PIN_LENGTH, PIN_WIDE
+
 
 def place_pin(die_area, layer, bterm, pos, side='N', wide=False):
 	# Get limits
@@ -22,12 +23,9 @@ def place_pin(die_area, layer, bterm, pos, side='N', wide=False):
 	bpin = odb.dbBPin_create(bterm)
 	bpin.setPlacementStatus("PLACED")
 
-	# Rectangle graphic
-	WIDTH  = tt.LayoutDimension(300).iu
-	LENGTH = tt.LayoutDimension(1000).iu
-
-	if wide:
-		WIDTH *= 3
+	# Rectangle graphic (in the units of the position's context)
+	WIDTH  = pos.ctx.to_iu(PIN_WIDTH * (PIN_WIDE if wide else 1))
+	LENGTH = pos.ctx.to_iu(PIN_LENGTH)
 
 	pos = pos.iu
 